@@ -2,8 +2,8 @@
 
 import os
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,6 +12,8 @@ import logging
 from database import get_db
 import crud
 import schemas
+import hashing
+import user_cache
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -22,26 +24,24 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # --- 1. PASSWORD HASHING (Argon2) ---
-# We use argon2 to avoid the 'password too long' crash you saw earlier
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Lives in hashing.py: one shared context, run on a worker pool off the event loop.
 
 # --- 2. OAUTH CONFIG ---
 # This specific URL fixes the "Authorize" button in Swagger UI
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 async def authenticate_user(db: AsyncSession, username: str, password: str):
     # We look up by username because the login form sends 'username' field
     user = await crud.get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    is_valid, new_hash = await hashing.verify_password(password, user.hashed_password)
+    if not is_valid:
         return None
+    if new_hash:
+        # Stored hash used older Argon2 parameters; upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -63,6 +63,11 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    # Same token seen recently? Skip the JWT decode and the DB round trip.
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
     
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -76,11 +81,30 @@ async def get_current_user(
     user = await crud.get_user_by_username(db, username=username)
     if user is None:
         raise credentials_exception
-    return user
+
+    snapshot = schemas.User.model_validate(user)
+    user_cache.put(token, snapshot, payload.get("exp"))
+    return snapshot
 
 # --- 3. ACTIVE USER CHECK ---
 # We removed the 'is_active' check because we deleted that column from the DB.
 async def get_current_active_user(
     current_user: schemas.User = Depends(get_current_user)
 ) -> schemas.User:
-    return current_user
\ No newline at end of file
+    return current_user
+
+# --- 4. OPTIONAL USER ---
+# For public endpoints that personalise the response when a token is sent
+# (e.g. liked_by_me on the feed). Missing or bad tokens just mean anonymous.
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
+
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[schemas.User]:
+    if not token:
+        return None
+    try:
+        return await get_current_user(token=token, db=db)
+    except HTTPException:
+        return None
@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_serialization.py
+#
+# CPU cost of turning one 20-card feed page into JSON bytes:
+#   default : what FastAPI does with response_model (validate, dump to dicts, json.dumps)
+#   fast    : serialization.json_response (prebuilt TypeAdapter -> JSON bytes)
+# No database involved; the ORM objects are built in memory.
+#
+#   cd backend && python benchmarks/bench_serialization.py [--posts 20] [--comments 3] [--rounds 2000]
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+import models, schemas
+from serialization import json_response
+
+def build_page(n_posts: int, n_comments: int):
+    now = datetime.now(timezone.utc)
+    users = [models.User(id=i, username=f"user{i}", email=f"user{i}@example.com", points=i * 50) for i in range(1, 11)]
+    posts = []
+    for i in range(1, n_posts + 1):
+        key = f"{i:064x}"
+        post = models.Post(
+            id=i, image_url=f"https://res.cloudinary.com/demo/image/upload/community_app_posts/{key}.webp",
+            image_public_id=f"community_app_posts/{key}", caption=f"Pothole on street {i}, please fix",
+            latitude=12.97 + i / 1000, longitude=77.59 + i / 1000, status=models.TaskStatus.OPEN,
+            created_at=now, author_id=users[i % 10].id, like_count=i, comment_count=n_comments,
+            resolved_by_id=None, proof_image_url=None,
+        )
+        post.author = users[i % 10]
+        post.resolved_by = None
+        post.comments = [
+            models.Comment(id=i * 100 + j, content=f"On it #{j}", created_at=now, author_id=users[j % 10].id,
+                           post_id=i, author=users[j % 10])
+            for j in range(n_comments)
+        ]
+        post.liked_by_me = i % 2 == 0
+        posts.append(post)
+    return posts
+
+async def default_path(field, posts) -> bytes:
+    content = await serialize_response(field=field, response_content=posts)
+    return JSONResponse(content).body
+
+def fast_path(posts) -> bytes:
+    return json_response(List[schemas.PostSummary], posts).body
+
+def measure(fn, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - start) / rounds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--comments", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    posts = build_page(args.posts, args.comments)
+    field = create_model_field(name="response", type_=List[schemas.PostSummary], mode="serialization")
+    loop = asyncio.new_event_loop()
+    run_default = lambda: loop.run_until_complete(default_path(field, posts))
+
+    # Same document either way
+    assert json.loads(run_default()) == json.loads(fast_path(posts))
+
+    measure(run_default, 50)
+    measure(lambda: fast_path(posts), 50)
+    default_us = measure(run_default, args.rounds)
+    fast_us = measure(lambda: fast_path(posts), args.rounds)
+    print(f"{args.posts} posts x {args.comments} comments, {len(fast_path(posts))} bytes")
+    print(f"default : {default_us:8.1f} us CPU / request")
+    print(f"fast    : {fast_us:8.1f} us CPU / request")
+    print(f"saved   : {default_us - fast_us:8.1f} us ({(1 - fast_us / default_us) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
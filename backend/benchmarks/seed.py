@@ -0,0 +1,142 @@
+# backend/benchmarks/seed.py
+#
+# Deterministic synthetic data for benchmarks: users, posts spread around a few
+# cities, a mix of open/pending/completed tasks, comments, likes and points.
+# Writes straight to the tables the app uses (counters, geohash, change_seq,
+# ledger and sync counter included), so every endpoint sees consistent data.
+#
+#   cd backend && DATABASE_URL=sqlite+aiosqlite:///./bench.db python benchmarks/seed.py --users 500 --posts 5000
+
+import os
+import sys
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, delete, text
+
+PASSWORD = "benchmark-password"
+POINTS_PER_TASK = 50
+
+# (lat, lon) centres; posts are scattered ~5km around them
+CITIES = [
+    (12.9716, 77.5946),   # Bengaluru
+    (19.0760, 72.8777),   # Mumbai
+    (28.6139, 77.2090),   # Delhi
+    (13.0827, 80.2707),   # Chennai
+]
+CITY_SPREAD_DEG = 0.05
+STATUS_MIX = (("open", 0.6), ("pending", 0.25), ("completed", 0.15))
+CAPTIONS = ["Pothole on the main road", "Overflowing garbage bin", "Broken streetlight",
+            "Fallen tree blocking path", "Water logging after rain", "Stray dog needs help",
+            "Graffiti on the wall", "Plastic waste near the lake"]
+BATCH = 1000
+
+async def _insert(conn, table, rows):
+    for i in range(0, len(rows), BATCH):
+        await conn.execute(insert(table), rows[i:i + BATCH])
+
+async def seed(engine, users: int = 200, posts: int = 2000, comments_per_post: float = 3.0,
+               likes_per_post: float = 5.0, seed_value: int = 42) -> dict:
+    import models, hashing, migrations
+
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    # One real Argon2 hash shared by everyone: logins verify for real, seeding stays fast
+    hashed = await hashing.hash_password(PASSWORD)
+
+    await migrations.upgrade(engine)
+    async with engine.begin() as conn:
+        for model in (models.PointsLedger, models.Like, models.Comment, models.Post, models.User, models.SyncCounter):
+            await conn.execute(delete(model))
+
+        user_rows = [
+            {"id": uid, "username": f"user{uid}", "email": f"user{uid}@example.com",
+             "hashed_password": hashed, "points": 0,
+             "created_at": now - timedelta(days=90, minutes=uid)}
+            for uid in range(1, users + 1)
+        ]
+
+        seq = 0
+        post_rows, comment_rows, like_rows, ledger_rows = [], [], [], []
+        comment_id = 0
+        for pid in range(1, posts + 1):
+            city_lat, city_lon = rng.choice(CITIES)
+            author = rng.randint(1, users)
+            status = rng.choices([s for s, _ in STATUS_MIX], [w for _, w in STATUS_MIX])[0]
+            resolver = None
+            if status != "open" and users > 1:
+                # Anyone but the author
+                resolver = rng.randint(1, users - 1)
+                resolver += resolver >= author
+            created = now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600))
+
+            n_comments = min(int(rng.expovariate(1 / comments_per_post)) if comments_per_post else 0, 50)
+            likers = rng.sample(range(1, users + 1), min(users, int(rng.expovariate(1 / likes_per_post)) if likes_per_post else 0))
+
+            seq += 1
+            post_rows.append({
+                "id": pid, "author_id": author, "resolved_by_id": resolver,
+                "status": models.TaskStatus(status),
+                "image_url": f"https://res.cloudinary.com/demo/image/upload/community_app_posts/{pid:064x}.webp",
+                "image_public_id": f"community_app_posts/{pid:064x}",
+                "proof_image_url": "https://example.com/proof.webp" if resolver else None,
+                "caption": rng.choice(CAPTIONS),
+                "latitude": rng.gauss(city_lat, CITY_SPREAD_DEG),
+                "longitude": rng.gauss(city_lon, CITY_SPREAD_DEG),
+                "created_at": created,
+                "like_count": len(likers), "comment_count": n_comments,
+                "change_seq": seq,
+            })
+            for _ in range(n_comments):
+                comment_id += 1
+                seq += 1
+                comment_rows.append({
+                    "id": comment_id, "post_id": pid, "author_id": rng.randint(1, users),
+                    "content": rng.choice(["On it!", "I can help this weekend", "Is this still open?", "Done, uploading proof"]),
+                    "created_at": created + timedelta(minutes=rng.randint(1, 600)),
+                    "change_seq": seq,
+                })
+            like_rows.extend({"user_id": uid, "post_id": pid} for uid in likers)
+            if status == "completed":
+                user_rows[resolver - 1]["points"] += POINTS_PER_TASK
+                ledger_rows.append({"user_id": resolver, "post_id": pid, "delta": POINTS_PER_TASK, "reason": "task_completed"})
+
+        await _insert(conn, models.User.__table__, user_rows)
+        await _insert(conn, models.Post.__table__, post_rows) # geohash comes from the column default
+        await _insert(conn, models.Comment.__table__, comment_rows)
+        await _insert(conn, models.Like.__table__, like_rows)
+        await _insert(conn, models.PointsLedger.__table__, ledger_rows)
+        await conn.execute(insert(models.SyncCounter).values(id=1, value=seq))
+
+        if conn.dialect.name == "postgresql":
+            # Ids were given explicitly; move the sequences past them
+            for table in ("users", "posts", "comments"):
+                await conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+
+    return {
+        "users": users, "posts": posts, "comments": len(comment_rows), "likes": len(like_rows),
+        "password": PASSWORD, "usernames": [row["username"] for row in user_rows],
+        "post_ids": list(range(1, posts + 1)),
+    }
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Fill DATABASE_URL with synthetic benchmark data (replaces existing rows!)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--comments-per-post", type=float, default=3.0)
+    parser.add_argument("--likes-per-post", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from database import engine
+    info = await seed(engine, args.users, args.posts, args.comments_per_post, args.likes_per_post, args.seed)
+    await engine.dispose()
+    print(f"Seeded {info['users']} users, {info['posts']} posts, {info['comments']} comments, "
+          f"{info['likes']} likes (password: {info['password']})")
+
+if __name__ == "__main__":
+    asyncio.run(_main())
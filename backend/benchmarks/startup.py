@@ -0,0 +1,97 @@
+# backend/benchmarks/startup.py
+#
+# Cold-start budget: how long a fresh worker takes to import the app and run
+# its startup, measured in new interpreter processes (as on every deploy or
+# scale-out). Exits 1 when a budget is exceeded or a heavy module that
+# should load lazily (Pillow, Cloudinary) is imported at startup.
+#
+#   cd backend
+#   python benchmarks/startup.py
+#   python benchmarks/startup.py --runs 10 --import-budget-ms 800 --startup-budget-ms 200
+#
+# tests/test_startup.py holds the default budgets in the test suite.
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until something actually needs them
+LAZY_MODULES = ("PIL", "cloudinary")
+IMPORT_BUDGET_MS = 1500
+STARTUP_BUDGET_MS = 500
+
+# Runs in the child process; prints one JSON line
+_CHILD = """
+import sys, time, json, asyncio
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def _startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(_startup())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+def measure(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD % (LAZY_MODULES,)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def prepare_env(database_url: str = None) -> dict:
+    tmp = tempfile.mkdtemp(prefix="startup-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'startup.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "startup-check"),
+    }
+    # Startup refuses an unmigrated schema, so bring the database up to date first
+    subprocess.run([sys.executable, "migrations.py"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    return env
+
+def main(args) -> int:
+    env = prepare_env(args.database_url)
+    measure(env) # Writes the bytecode caches, like the first boot after a deploy
+    runs = [measure(env) for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    startup_ms = statistics.median(r["startup_ms"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+
+    print(f"import main:  {import_ms:7.1f} ms (budget {args.import_budget_ms} ms)")
+    print(f"startup:      {startup_ms:7.1f} ms (budget {args.startup_budget_ms} ms)")
+    print(f"lazy modules: {', '.join(loaded) + ' loaded at startup' if loaded else 'not loaded'}")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import took {import_ms:.0f} ms, budget {args.import_budget_ms} ms")
+    if startup_ms > args.startup_budget_ms:
+        failures.append(f"startup took {startup_ms:.0f} ms, budget {args.startup_budget_ms} ms")
+    if loaded:
+        failures.append(f"{', '.join(loaded)} imported at startup; import them where they are used")
+    if failures:
+        print("\nOVER BUDGET:\n  " + "\n  ".join(failures))
+        return 1
+    print("\nWithin budget.")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check cold import and startup time against a budget")
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file (migrated first)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to measure; the median counts")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+# backend/clusters.py
+
+import time
+from collections import OrderedDict
+from sqlalchemy import select, func, case, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models, geo
+
+# Map clustering for zoomed-out views. Open/pending tasks are grouped by geohash
+# prefix in the database; only sparse cells come back as individual points.
+POINT_THRESHOLD = 5         # Cells with fewer tasks than this are sent as points
+MAX_GRID_CELLS = 1024       # A full-screen map at its zoom's grid is ~500; bigger boxes get coarser cells
+MAX_POINTS = 1000           # Beyond this the response is marked truncated; zoom in for the rest
+CACHE_TTL_SECONDS = 30      # Safety net for other workers' writes we never hear about
+CACHE_MAX_ENTRIES = 4096
+
+# (cover cell, cluster precision) -> (stored_at, clusters, points)
+_cache = OrderedDict()
+
+# --- 1. ZOOM -> GRID ---
+def precision_for_zoom(zoom: int) -> int:
+    # A 256px web-mercator tile at zoom z spans 360/2^z degrees of longitude.
+    # Pick the finest geohash whose cells are still about a quarter tile wide.
+    target_width = 360.0 / (1 << (zoom + 2))
+    for precision in range(geo.GEOHASH_PRECISION, 0, -1):
+        if geo.cell_size(precision)[1] >= target_width:
+            return precision
+    return 1
+
+# --- 2. CACHE ---
+def _cache_get(key):
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] > CACHE_TTL_SECONDS:
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return entry
+
+def _cache_put(key, clusters, points):
+    _cache[key] = (time.monotonic(), clusters, points)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+def invalidate(geohash):
+    # Drop every cached cell that contains this point, at every precision.
+    if not geohash:
+        return
+    for length in range(1, len(geohash) + 1):
+        for precision in range(1, geo.GEOHASH_PRECISION + 1):
+            _cache.pop((geohash[:length], precision), None)
+
+# --- 3. AGGREGATION ---
+async def _load_cells(db: AsyncSession, cover, precision: int):
+    cell = func.substr(models.Post.geohash, 1, precision).label("cell")
+    in_cover = or_(*geo.prefix_ranges(models.Post.geohash, cover))
+    open_tasks = models.Post.status != models.TaskStatus.COMPLETED
+
+    query = (
+        select(
+            cell,
+            func.count(models.Post.id),
+            func.avg(models.Post.latitude),
+            func.avg(models.Post.longitude),
+            func.sum(case((models.Post.status == models.TaskStatus.OPEN, 1), else_=0)),
+            func.sum(case((models.Post.status == models.TaskStatus.PENDING_VERIFICATION, 1), else_=0)),
+        )
+        .where(open_tasks, in_cover)
+        .group_by(cell)
+    )
+    clusters, sparse = {}, []
+    for cell_id, count, latitude, longitude, open_count, pending_count in (await db.execute(query)).all():
+        if count < POINT_THRESHOLD:
+            sparse.append(cell_id)
+            continue
+        clusters[cell_id] = {
+            "cell": cell_id,
+            "count": count,
+            "latitude": latitude,
+            "longitude": longitude,
+            "open": open_count,
+            "pending": pending_count,
+        }
+
+    points = []
+    if sparse:
+        query = (
+            select(models.Post.id, models.Post.latitude, models.Post.longitude, models.Post.status, models.Post.geohash)
+            .where(open_tasks, in_cover)
+            .where(func.substr(models.Post.geohash, 1, precision).in_(sparse))
+        )
+        for post_id, latitude, longitude, status, geohash in (await db.execute(query)).all():
+            points.append({
+                "id": post_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "status": status,
+                "geohash": geohash,
+            })
+
+    # Split the combined result back per cover cell so each one is cached separately.
+    # Cover cells all share one precision, so the owner is just a prefix.
+    cover_len = len(cover[0])
+    by_cover = {c: ([], []) for c in cover}
+    for cluster in clusters.values():
+        by_cover[cluster["cell"][:cover_len]][0].append(cluster)
+    for point in points:
+        by_cover[point["geohash"][:cover_len]][1].append(point)
+    return by_cover
+
+async def get_clusters(db: AsyncSession, west: float, south: float, east: float, north: float, zoom: int):
+    # The zoom's grid, unless the box is so large for that zoom that it would
+    # span more than MAX_GRID_CELLS cells; then the coarser grid that fits
+    precision = min(precision_for_zoom(zoom), geo.grid_precision(west, south, east, north, MAX_GRID_CELLS))
+    # Cover cells must be no finer than the cluster grid so clusters nest inside them
+    cover = geo.cover_cells(west, south, east, north, max_precision=precision)
+
+    clusters, points, missing = [], [], []
+    for c in cover:
+        entry = _cache_get((c, precision))
+        if entry is None:
+            missing.append(c)
+        else:
+            clusters.extend(entry[1])
+            points.extend(entry[2])
+
+    if missing:
+        for c, (cell_clusters, cell_points) in (await _load_cells(db, missing, precision)).items():
+            _cache_put((c, precision), cell_clusters, cell_points)
+            clusters.extend(cell_clusters)
+            points.extend(cell_points)
+
+    def in_view(item):
+        return south <= item["latitude"] <= north and west <= item["longitude"] <= east
+
+    points = [p for p in points if in_view(p)]
+    return {
+        "zoom": zoom,
+        "precision": precision,
+        "clusters": [c for c in clusters if in_view(c)],
+        "points": points[:MAX_POINTS],
+        "truncated": len(points) > MAX_POINTS,
+    }
@@ -0,0 +1,34 @@
+# backend/conditional.py
+
+import hashlib
+from fastapi import Request, Response
+
+# Polling endpoints answer If-None-Match with a bodyless 304 when nothing changed.
+# The ETag is a hash of a cheap version stamp (a counter or a few columns) plus
+# everything else the body depends on (query params, who is asking), so it is
+# known before the heavy query and serialization run.
+# "no-cache" means: keep it, but check with us before reusing it.
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+def check(request: Request, response: Response, *parts):
+    # Returns a 304 to send straight back, or None after stamping the 200 response
+    etag = make_etag(request.url.path, str(request.query_params), *parts)
+    if _matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
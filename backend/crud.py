@@ -1,16 +1,11 @@
 # backend/crud.py
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload # <--- Imported for relationship loading
-from passlib.context import CryptContext
-import models, schemas
-
-# Setup password hashing (Argon2)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+from sqlalchemy import select, insert, update, delete, func, literal
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+import models, schemas, hashing, leaderboard
+from pagination import decode_row_cursor, newest_first, older_than, next_cursor
 
 # --- USER OPERATIONS ---
 
@@ -30,7 +25,7 @@ async def get_user_by_username(db: AsyncSession, username: str):
     return result.scalars().first()
 
 async def create_user(db: AsyncSession, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hashing.hash_password(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -40,8 +35,48 @@ async def create_user(db: AsyncSession, user: schemas.UserCreate):
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    leaderboard.set_points(db_user.id, db_user.username, db_user.points)
     return db_user
 
+# --- CHANGE SEQUENCE (for /sync) ---
+
+async def next_change_seq(db: AsyncSession) -> int:
+    # Locks the counter row until commit, which serializes every writer. Call it
+    # last, once every conditional write has matched, and stamp the value on
+    # in the final UPDATE (see stamp_change_seq).
+    bump = (
+        update(models.SyncCounter)
+        .where(models.SyncCounter.id == 1)
+        .values(value=models.SyncCounter.value + 1)
+        .returning(models.SyncCounter.value)
+    )
+    seq = (await db.execute(bump)).scalar()
+    if seq is None:
+        # Fresh database: start the counter
+        await db.execute(insert(models.SyncCounter).values(id=1, value=1))
+        seq = 1
+    return seq
+
+async def stamp_change_seq(db: AsyncSession, model, row_id: int) -> int:
+    seq = await next_change_seq(db)
+    await db.execute(update(model).where(model.id == row_id).values(change_seq=seq))
+    return seq
+
+async def current_change_seq(db: AsyncSession) -> int:
+    # Latest committed stamp: one primary-key lookup
+    result = await db.execute(select(models.SyncCounter.value).where(models.SyncCounter.id == 1))
+    return result.scalar() or 0
+
+async def get_comment_thread_version(db: AsyncSession, post_id: int):
+    # Every new comment bumps the post's change_seq and comment_count. The thread
+    # also shows each author's points, which only change with a ledger row, so the
+    # newest ledger id (a primary-key max) rides along in the same statement.
+    points_seq = select(func.max(models.PointsLedger.id)).scalar_subquery()
+    result = await db.execute(
+        select(models.Post.change_seq, models.Post.comment_count, points_seq).where(models.Post.id == post_id)
+    )
+    return tuple(result.first() or ())
+
 # --- POST OPERATIONS (This was missing!) ---
 
 async def get_post(db: AsyncSession, post_id: int):
@@ -49,35 +84,169 @@ async def get_post(db: AsyncSession, post_id: int):
     result = await db.execute(query)
     return result.scalars().first()
 
-# --- COMMENT OPERATIONS ---
+def post_summary_options():
+    # Author/resolver are many-to-one, so join them into the page query.
+    # like_count/comment_count are counter columns, so a page never touches
+    # the like/comment rows themselves.
+    return (
+        joinedload(models.Post.author),
+        joinedload(models.Post.resolved_by),
+    )
+
+async def attach_latest_comments(db: AsyncSession, posts: list, per_post: int):
+    # One windowed query for the whole page: the newest `per_post` comments of each post.
+    # set_committed_value fills post.comments without marking it dirty or lazy loading.
+    by_post = {post.id: [] for post in posts}
+    if by_post and per_post > 0:
+        ranked = (
+            select(
+                models.Comment.id,
+                func.row_number().over(
+                    partition_by=models.Comment.post_id,
+                    order_by=(models.Comment.created_at.desc(), models.Comment.id.desc())
+                ).label("rn")
+            )
+            .where(models.Comment.post_id.in_(list(by_post)))
+            .subquery()
+        )
+        query = (
+            select(models.Comment)
+            .join(ranked, ranked.c.id == models.Comment.id)
+            .options(joinedload(models.Comment.author))
+            .where(ranked.c.rn <= per_post)
+            .order_by(models.Comment.created_at.desc(), models.Comment.id.desc())
+        )
+        result = await db.execute(query)
+        for comment in result.scalars().all():
+            by_post[comment.post_id].append(comment)
+
+    for post in posts:
+        set_committed_value(post, "comments", by_post[post.id])
+    return posts
+
+async def attach_liked_by_me(db: AsyncSession, posts: list, user_id):
+    # One lookup on the (user_id, post_id) unique index for the whole page
+    liked = set()
+    if user_id is not None and posts:
+        query = (
+            select(models.Like.post_id)
+            .where(models.Like.user_id == user_id)
+            .where(models.Like.post_id.in_([post.id for post in posts]))
+        )
+        liked = set((await db.execute(query)).scalars().all())
+    for post in posts:
+        post.liked_by_me = post.id in liked # Plain attribute, read by PostSummary
+    return posts
+
+# --- LIKE OPERATIONS ---
+
+def _dialect_insert(db: AsyncSession):
+    # INSERT ... ON CONFLICT DO NOTHING lives in the dialect modules
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
 
-async def create_comment(db: AsyncSession, comment: schemas.CommentCreate, user_id: int, post_id: int):
-    db_comment = models.Comment(
-        content=comment.content,
-        author_id=user_id,
-        post_id=post_id
+async def like_post(db: AsyncSession, user_id: int, post_id: int):
+    # Returns the new like_count, or None if the post doesn't exist.
+    # Liking twice is a no-op, even when two requests race.
+    insert = _dialect_insert(db)
+    add_like = (
+        insert(models.Like)
+        .from_select(
+            ["user_id", "post_id"],
+            select(literal(user_id), models.Post.id).where(models.Post.id == post_id)
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+        .returning(models.Like.id)
     )
-    db.add(db_comment)
-    await db.commit()
-    await db.refresh(db_comment)
-    
-    # --- CRITICAL FIX FOR COMMENTS ---
-    # We must reload the comment with the Author attached.
-    # Otherwise, Pydantic tries to read 'comment.author' and crashes the async session.
+    if (await db.execute(add_like)).first() is not None:
+        return await _bump_like_count(db, post_id, 1)
+    return await _current_like_count(db, post_id)
+
+async def unlike_post(db: AsyncSession, user_id: int, post_id: int):
+    remove_like = (
+        delete(models.Like)
+        .where(models.Like.user_id == user_id, models.Like.post_id == post_id)
+        .returning(models.Like.id)
+    )
+    if (await db.execute(remove_like)).first() is not None:
+        return await _bump_like_count(db, post_id, -1)
+    return await _current_like_count(db, post_id)
+
+async def _bump_like_count(db: AsyncSession, post_id: int, delta: int):
+    # The like row changed, so the post exists: this UPDATE always matches and
+    # can take the sequence value as the last statement before commit
+    seq = await next_change_seq(db)
     query = (
-        select(models.Comment)
-        .options(selectinload(models.Comment.author))
-        .where(models.Comment.id == db_comment.id)
+        update(models.Post)
+        .where(models.Post.id == post_id)
+        .values(like_count=models.Post.like_count + delta, change_seq=seq)
+        .returning(models.Post.like_count)
     )
-    result = await db.execute(query)
-    return result.scalars().first()
+    like_count = (await db.execute(query)).scalar()
+    await db.commit()
+    return like_count
+
+async def _current_like_count(db: AsyncSession, post_id: int):
+    query = select(models.Post.like_count).where(models.Post.id == post_id)
+    like_count = (await db.execute(query)).scalar()
+    await db.commit()
+    return like_count
+
+# --- COMMENT OPERATIONS ---
+
+async def create_comment(db: AsyncSession, comment: schemas.CommentCreate, author: schemas.User, post_id: int):
+    # INSERT ... SELECT ... RETURNING: inserts nothing (-> None) if the post doesn't exist,
+    # and hands back the generated columns without a refresh or a reload.
+    # The author is the caller's own user, so there's nothing to look up.
+    add_comment = (
+        insert(models.Comment)
+        .from_select(
+            ["content", "author_id", "post_id"],
+            select(literal(comment.content), literal(author.id), models.Post.id)
+            .where(models.Post.id == post_id)
+        )
+        .returning(models.Comment.id, models.Comment.created_at)
+    )
+    row = (await db.execute(add_comment)).first()
+    if row is None:
+        return None
+
+    # Sequence last, so the counter is only locked for the two stamping UPDATEs
+    seq = await next_change_seq(db)
+    post_geohash = (await db.execute(
+        update(models.Post)
+        .where(models.Post.id == post_id)
+        .values(comment_count=models.Post.comment_count + 1, change_seq=seq)
+        .returning(models.Post.geohash)
+    )).scalar()
+    await db.execute(update(models.Comment).where(models.Comment.id == row.id).values(change_seq=seq))
+    await db.commit()
+    return {
+        "id": row.id,
+        "content": comment.content,
+        "author_id": author.id,
+        "post_id": post_id,
+        "created_at": row.created_at,
+        "author": schemas.UserPublic.model_validate(author),
+        # Not part of schemas.Comment; used to route the live event
+        "change_seq": seq,
+        "post_geohash": post_geohash,
+    }
 
-async def get_comments_by_post(db: AsyncSession, post_id: int):
+async def get_comments_by_post(db: AsyncSession, post_id: int, limit: int, cursor: str = None):
+    # Newest first, keyset-paged on the (post_id, created_at, id) index
     query = (
         select(models.Comment)
         .where(models.Comment.post_id == post_id)
-        .options(selectinload(models.Comment.author)) # Load author name for UI
-        .order_by(models.Comment.created_at.desc())
+        .options(joinedload(models.Comment.author)) # Load author name for UI
+        .order_by(*newest_first(models.Comment))
+        .limit(limit)
     )
+    if cursor:
+        query = query.where(older_than(models.Comment, decode_row_cursor(cursor)))
     result = await db.execute(query)
-    return result.scalars().all()
\ No newline at end of file
+    comments = result.scalars().all()
+    return comments, next_cursor(comments, limit)
@@ -1,12 +1,19 @@
 # backend/database.py
 
 import os
+import time
+import asyncio
 import logging
 import ssl
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
+import metrics
+import querywatch
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -17,26 +24,127 @@ if not DATABASE_URL:
     logger.critical("DATABASE_URL not found. Please check your .env file.")
     raise ValueError("No DATABASE_URL found.")
 
-# --- FIX: SSL CONFIGURATION ---
-connect_args = {}
-
-# If we are connecting to a remote Postgres (like Railway), we usually need SSL.
-# We check if the URL contains "postgresql" to apply this fix.
-if "postgresql" in DATABASE_URL:
-    # Create a flexible SSL context that accepts self-signed certificates
-    # (Common requirement for many cloud database providers)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    connect_args["ssl"] = ctx
-
-# Create the engine with the SSL args
+# --- POOL SETTINGS (optional, defaults shown in README) ---
+# Each worker process has its own pool: size it so that
+# workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under the server's max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))       # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))       # reopen connections older than this
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # drop connections the server closed while idle
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))  # connections opened at startup
+# Prepared statements cached per connection (asyncpg). Set 0 behind PgBouncer in transaction mode.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# --- POOL STATS ---
+# Time from asking for a connection to holding a usable one: queueing for a
+# free slot, opening a new connection (TLS + auth) and the pre-ping.
+_pool_stats = {"checkouts": 0, "connects": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - start
+            metrics.DB_POOL_WAIT_SECONDS.observe(waited)
+            _pool_stats["checkouts"] += 1
+            _pool_stats["wait_seconds_total"] += waited
+            _pool_stats["wait_seconds_max"] = max(_pool_stats["wait_seconds_max"], waited)
+
+def _connect_args():
+    connect_args = {}
+    # If we are connecting to a remote Postgres (like Railway), we usually need SSL.
+    # We check if the URL contains "postgresql" to apply this fix.
+    if "postgresql" in DATABASE_URL:
+        # Create a flexible SSL context that accepts self-signed certificates
+        # (Common requirement for many cloud database providers)
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = ctx
+    if "asyncpg" in DATABASE_URL:
+        connect_args["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE           # asyncpg's own cache
+        connect_args["prepared_statement_cache_size"] = DB_STATEMENT_CACHE_SIZE  # SQLAlchemy's adapter cache
+    return connect_args
+
+def _pool_args():
+    # SQLite (local dev) keeps SQLAlchemy's default pool; sizing only matters for a server
+    if IS_SQLITE:
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+# Create the engine with the SSL and pool args
 engine = create_async_engine(
     DATABASE_URL,
-    connect_args=connect_args,
-    echo=False # Set to True if you want to see SQL queries in logs
+    connect_args=_connect_args(),
+    echo=False, # Set to True if you want to see SQL queries in logs
+    **_pool_args()
 )
+
+@event.listens_for(engine.sync_engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    _pool_stats["connects"] += 1
+
+# Statement count and time, per request and in total (see metrics.py)
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _statement_start(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _statement_end(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    metrics.record_statement(elapsed)
+    if querywatch.ENABLED:
+        querywatch.record(statement, parameters, elapsed)
+
+async def warm_up_pool():
+    # Open connections at startup so the first requests don't pay for them
+    count = min(DB_POOL_WARMUP, DB_POOL_SIZE) if not IS_SQLITE else 0
+    if count <= 0:
+        return
+
+    async def _open():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    conns = await asyncio.gather(*(_open() for _ in range(count)), return_exceptions=True)
+    for conn in conns:
+        if isinstance(conn, Exception):
+            logger.warning(f"Pool warm-up connection failed: {conn}")
+        else:
+            await conn.close() # Back to the pool, still open
+    logger.info(f"Database pool warmed with {sum(not isinstance(c, Exception) for c in conns)} connections.")
+
+def pool_stats():
+    pool = engine.pool
+    stats = {
+        "pool": type(pool).__name__,
+        "connects": _pool_stats["connects"],
+        "checkouts": _pool_stats["checkouts"],
+        "wait_ms_avg": round(_pool_stats["wait_seconds_total"] / _pool_stats["checkouts"] * 1000, 3) if _pool_stats["checkouts"] else 0.0,
+        "wait_ms_max": round(_pool_stats["wait_seconds_max"] * 1000, 3),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": DB_MAX_OVERFLOW,
+        })
+    return stats
 # ------------------------------
 
 AsyncSessionLocal = sessionmaker(
@@ -0,0 +1,111 @@
+# backend/events.py
+
+import os
+import json
+import asyncio
+import logging
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# In-process pub/sub for live task updates (GET/WS /events).
+# Each connection gets its own bounded queue. publish() never waits: a client
+# that lets its queue fill up is dropped and told to resync via GET /sync/.
+# Only this worker's writes are seen here; with several workers, put them
+# behind sticky sessions or feed the bus from a shared broker.
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "10000"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Coarsest cell a bbox filter is turned into (~1.2km x 0.6km at precision 6)
+EVENTS_FILTER_PRECISION = 6
+
+class Subscriber:
+    def __init__(self, cells):
+        self.cells = cells      # Geohash prefixes, or () for everything
+        self.queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+
+    async def next(self):
+        # Next event, None on heartbeat timeout; raises once the bus dropped us
+        try:
+            event = await asyncio.wait_for(self.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            return None
+        if event is _DROPPED:
+            raise ConnectionAbortedError("Subscriber fell behind")
+        return event
+
+_DROPPED = object()
+_subscribers = set()
+_everything = set()     # Subscribers without a filter
+_by_cell = {}           # Geohash prefix -> subscribers watching it
+_stats = {"published": 0, "delivered": 0, "dropped_subscribers": 0}
+
+# --- 1. SUBSCRIPTIONS ---
+def subscribe(cells=()) -> Subscriber:
+    if subscriber_count() >= EVENTS_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many live connections, poll /sync/ instead")
+    sub = Subscriber(tuple(cells))
+    _subscribers.add(sub)
+    if not sub.cells:
+        _everything.add(sub)
+    for cell in sub.cells:
+        _by_cell.setdefault(cell, set()).add(sub)
+    return sub
+
+def unsubscribe(sub: Subscriber):
+    _subscribers.discard(sub)
+    _everything.discard(sub)
+    for cell in sub.cells:
+        watchers = _by_cell.get(cell)
+        if watchers is not None:
+            watchers.discard(sub)
+            if not watchers:
+                del _by_cell[cell]
+
+def subscriber_count() -> int:
+    return len(_subscribers)
+
+# --- 2. PUBLISHING ---
+def publish(event_type: str, data: dict, geohash=None):
+    # Call after the write has committed. Cost is one lookup per prefix of the
+    # post's geohash, not one check per connection.
+    event = {"type": event_type, "data": data}
+    targets = set(_everything)
+    if geohash:
+        for length in range(1, len(geohash) + 1):
+            targets |= _by_cell.get(geohash[:length], set())
+
+    _stats["published"] += 1
+    for sub in targets:
+        try:
+            sub.queue.put_nowait(event)
+            _stats["delivered"] += 1
+        except asyncio.QueueFull:
+            _drop(sub)
+
+def _drop(sub: Subscriber):
+    unsubscribe(sub)
+    _stats["dropped_subscribers"] += 1
+    # Discard its backlog so the marker fits and is the next thing it reads
+    while not sub.queue.empty():
+        sub.queue.get_nowait()
+    sub.queue.put_nowait(_DROPPED)
+    logger.info("Dropped a slow event subscriber")
+
+def post_event(event_type: str, post_id: int, status, geohash, change_seq: int):
+    # Events are small notices; clients fetch the details with GET /sync/.
+    publish(event_type, {
+        "post_id": post_id,
+        "status": getattr(status, "value", status),
+        "geohash": geohash,
+        "seq": change_seq,
+    }, geohash=geohash)
+
+# --- 3. WIRE FORMAT ---
+def sse_format(event) -> str:
+    if event is None:
+        return ": ping\n\n"     # Comment line: keeps proxies from closing an idle stream
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], separators=(',', ':'))}\n\n"
+
+def stats():
+    return {**_stats, "subscribers": subscriber_count()}
@@ -0,0 +1,107 @@
+# backend/geo.py
+
+import math
+from fastapi import HTTPException
+
+# Plain geohashes, stored on every post. Nearby cells share a prefix, so an
+# ordinary B-tree index on the string column answers "everything in these cells"
+# with a few range scans on SQLite and Postgres alike (no PostGIS needed).
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9   # ~4.8m x 4.8m, plenty for a pin on a map
+MAX_COVER_CELLS = 16    # Upper bound on range scans per query
+EARTH_RADIUS_M = 6_371_008.8
+
+# --- 1. ENCODING ---
+def encode(latitude, longitude, precision: int = GEOHASH_PRECISION):
+    if latitude is None or longitude is None:
+        return None
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, ch, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                ch = (ch << 1) | 1
+                lon_lo = mid
+            else:
+                ch <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+def cell_size(precision: int):
+    # (height, width) of a cell in degrees
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = (5 * precision) // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+# --- 2. BOUNDING BOXES ---
+# A bbox is (west, south, east, north), the same order map SDKs use.
+def parse_bbox(bbox: str):
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'")
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        # Boxes crossing the antimeridian should be split by the client.
+        raise HTTPException(status_code=400, detail="bbox is out of range or inverted")
+    return west, south, east, north
+
+def radius_bbox(latitude: float, longitude: float, radius_m: float):
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    # Clamp cos() near the poles so the box doesn't explode to infinity
+    dlon = dlat / max(math.cos(math.radians(latitude)), 0.01)
+    return (
+        max(longitude - dlon, -180.0),
+        max(latitude - dlat, -90.0),
+        min(longitude + dlon, 180.0),
+        min(latitude + dlat, 90.0),
+    )
+
+def grid_precision(west: float, south: float, east: float, north: float, max_cells: int, max_precision: int = GEOHASH_PRECISION):
+    # Finest precision whose cells cover the box in at most max_cells cells
+    for precision in range(max_precision, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        cols = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * cols <= max_cells:
+            return precision
+    return 1
+
+def cover_cells(west: float, south: float, east: float, north: float, max_precision: int = GEOHASH_PRECISION):
+    precision = grid_precision(west, south, east, north, MAX_COVER_CELLS, max_precision)
+    height, width = cell_size(precision)
+    cells = set()
+    for row in range(math.floor(south / height), math.floor(north / height) + 1):
+        for col in range(math.floor(west / width), math.floor(east / width) + 1):
+            # Encode the cell's centre, clamped back into valid coordinates
+            lat = min(max((row + 0.5) * height, -90.0), 90.0)
+            lon = min(max((col + 0.5) * width, -180.0), 180.0)
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+def prefix_ranges(column, cells):
+    # '{' sorts right after 'z', the last geohash character
+    return [(column >= cell) & (column < cell + "{") for cell in cells]
+
+# --- 3. DISTANCE ---
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
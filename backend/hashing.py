@@ -0,0 +1,87 @@
+# backend/hashing.py
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- 1. CONFIG ---
+# Argon2 costs are env-driven so we can tune them per machine. Raising them later
+# is safe: old hashes still verify and get upgraded on the next login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# "thread" is fine because argon2-cffi releases the GIL; "process" isolates it fully.
+HASH_POOL = os.getenv("HASH_POOL", "thread")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+# Jobs allowed to wait for a worker before we answer 503 instead of queueing more.
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "32"))
+
+# The one password context for the whole app
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+# --- 2. WORKER POOL ---
+_executor = None
+_in_flight = 0
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if HASH_POOL == "process":
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="argon2")
+    return _executor
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run(op: str, fn, *args):
+    global _in_flight
+    if _in_flight >= HASH_WORKERS + HASH_MAX_QUEUE:
+        logger.warning("Password hashing pool saturated, rejecting request")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _in_flight += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight -= 1
+        metrics.PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, op)
+
+# Module-level so they can be pickled into a process pool
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+# --- 3. PUBLIC API ---
+async def hash_password(password: str) -> str:
+    return await _run("hash", _hash, password)
+
+async def verify_password(password: str, hashed_password: str):
+    # Returns (is_valid, new_hash). new_hash is set when the stored hash uses
+    # outdated parameters and should be replaced.
+    return await _run("verify", _verify_and_update, password, hashed_password)
@@ -0,0 +1,83 @@
+# backend/imaging.py
+
+import os
+import io
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, UploadFile, status
+
+import metrics
+
+# --- 1. CONFIG ---
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Uploads processed/uploaded at once per worker; the rest wait their turn.
+IMAGE_MAX_CONCURRENCY = int(os.getenv("IMAGE_MAX_CONCURRENCY", "4"))
+
+# Every upload is stored at these sizes (largest first). "full" keeps the
+# original name so existing image_url values stay valid; see storage.variant_urls.
+RENDITIONS = (
+    ("full", (1920, 1080)),
+    ("medium", (960, 960)),
+    ("thumb", (320, 320)),
+)
+MAX_SIZE = RENDITIONS[0][1]
+WEBP_QUALITY = 85
+READ_CHUNK = 64 * 1024
+
+_executor = None
+# async with imaging.upload_slots: ... caps concurrent uploads
+upload_slots = asyncio.Semaphore(IMAGE_MAX_CONCURRENCY)
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _executor
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+# --- 2. READING ---
+async def read_upload(file: UploadFile) -> bytes:
+    # Read in chunks and stop as soon as the cap is crossed, instead of
+    # pulling an arbitrarily large body into memory first.
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image is too large.")
+    buffer = bytearray()
+    while chunk := await file.read(READ_CHUNK):
+        buffer += chunk
+        if len(buffer) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image is too large.")
+    return bytes(buffer)
+
+# --- 3. PROCESSING (runs in the process pool) ---
+def _to_renditions(data: bytes) -> dict:
+    # Imported here, in the pool worker: web workers that never see an upload never load Pillow
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale straight from the DCT,
+    # so a 12MP camera photo is never decoded at full size.
+    if img.format == "JPEG":
+        img.draft("RGB", MAX_SIZE)
+
+    # One decode; each smaller size is shrunk from the previous one.
+    renditions = {}
+    for name, size in RENDITIONS:
+        img.thumbnail(size)
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=WEBP_QUALITY)
+        renditions[name] = out.getvalue()
+    return renditions
+
+async def to_renditions(data: bytes) -> dict:
+    # {"full": webp bytes, "medium": ..., "thumb": ...}
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), _to_renditions, data)
+    finally:
+        metrics.IMAGE_PROCESSING_SECONDS.observe(time.perf_counter() - start)
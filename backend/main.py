@@ -1,20 +1,36 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
-from database import engine, Base
-from routers import auth, posts, comments, images, users
+from database import engine, warm_up_pool, pool_stats
+import migrations
+import hashing
+import imaging
+import storage
+import user_cache
+import events
+import metrics
+import querywatch
+import profiling
+from routers import auth, posts, comments, images, users, sync, events as events_router
 
 # --- Lifespan event for startup ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logging.info("Application startup...")
-    async with engine.begin() as conn: #creates new databases table if not already there
-        await conn.run_sync(Base.metadata.create_all)
-    logging.info("Database tables created/verified.")
+    # Schema changes are applied out-of-band (python migrations.py); here we only check the version
+    await migrations.check(engine)
+    logging.info("Database schema version verified.")
+    await warm_up_pool()
+    loop_lag = asyncio.create_task(metrics.watch_loop_lag())
     yield
     logging.info("Application shutdown...")
+    loop_lag.cancel()
+    hashing.shutdown()
+    imaging.shutdown()
+    await engine.dispose() # Close pooled connections cleanly
 
 app = FastAPI(
     lifespan=lifespan,
@@ -31,19 +47,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Search-Truncated", "ETag", "Server-Timing", "X-Profile-Id", "X-Profile-Top"],
 )
+# Dev/test only: N+1, slow-query and query-budget checks (QUERY_WATCH, see querywatch.py)
+if querywatch.ENABLED:
+    app.add_middleware(querywatch.QueryWatchMiddleware, engine=engine)
+# On-demand request profiling (PROFILE_TOKEN / PROFILE_SAMPLE_RATE, see profiling.py).
+# Not installed at all unless configured; inside metrics to read the request's SQL time
+if profiling.ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+# Outermost, so the latency covers CORS and every router
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Register Routers 
 app.include_router(auth.router, prefix="/auth") #handles authenitcation
 app.include_router(users.router)    # handles users data and stats
 app.include_router(posts.router)   # handles the posts router
 app.include_router(comments.router) # self explainatory ig
-app.include_router(images.router) #uploads images to cloudinary
+app.include_router(images.router) #uploads images to cloudinary (or local disk)
+app.include_router(sync.router) # incremental refresh for the app
+app.include_router(events_router.router) # live updates (SSE + WebSocket)
+
+# Local image storage is served straight from disk with immutable cache headers
+if storage.STORAGE_BACKEND == "local":
+    app.mount("/media", storage.ImmutableStaticFiles(directory=storage.get_storage().directory), name="media")
 #checks if api is up or not
 @app.get("/", tags=["Health Check"])
 def read_root():
     return {"message": "Community App API is running"}
 
+# In-process cache counters for this worker
+@app.get("/health/stats", tags=["Health Check"])
+def read_stats():
+    return {"user_cache": user_cache.stats(), "events": events.stats(), "db_pool": pool_stats()}
+
+# Prometheus scrape target (this worker only)
+metrics.Gauge("db_pool_connections", "Pooled connections by state",
+              lambda: {k: pool_stats().get(k, 0) for k in ("size", "checked_out", "checked_in", "overflow")}, "state")
+metrics.Gauge("events_subscribers", "Open /events connections", events.subscriber_count)
+
+@app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+def read_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
 
 
 #railway hosting???
\ No newline at end of file
@@ -0,0 +1,167 @@
+# backend/metrics.py
+
+import time
+import asyncio
+import logging
+import contextvars
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Minimal Prometheus-style metrics, rendered at GET /metrics in the text format.
+# Everything is updated from the event loop thread, so no locks are needed.
+# Labels must come from a small fixed set (route templates, not raw paths).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_registry = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, *labels):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+class Gauge:
+    # Read from a callback at scrape time: fn() -> number, or {label value: number}
+    def __init__(self, name: str, documentation: str, fn, labelname: str = None):
+        self.name, self.documentation, self.fn, self.labelname = name, documentation, fn, labelname
+        _registry.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        value = self.fn()
+        if isinstance(value, dict):
+            for label, v in value.items():
+                yield f"{self.name}{_format_labels((self.labelname,), (label,))} {_format_value(v)}"
+        else:
+            yield f"{self.name} {_format_value(value)}"
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            logger.warning(f"Metric {getattr(metric, 'name', metric)} failed to render: {e}")
+    return "\n".join(lines) + "\n"
+
+# --- 1. METRICS ---
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route", "status"))
+REQUEST_DB_STATEMENTS = Histogram("http_request_db_statements", "SQL statements run per request", ("method", "route"), COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per request", ("method", "route"))
+DB_STATEMENTS = Counter("db_statements_total", "SQL statements executed")
+DB_POOL_WAIT_SECONDS = Histogram("db_pool_checkout_wait_seconds", "Time to get a usable pooled connection")
+LOOP_LAG_SECONDS = Histogram("event_loop_lag_seconds", "How late a periodic event-loop timer fires",
+                             buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+PASSWORD_HASH_SECONDS = Histogram("password_hash_seconds", "Argon2 hash/verify time, queueing included", ("op",))
+IMAGE_PROCESSING_SECONDS = Histogram("image_processing_seconds", "Decode, resize and encode time per upload, queueing included")
+
+# --- 2. PER-REQUEST SQL ACCOUNTING ---
+# The middleware puts a [statements, seconds] pair in this context var;
+# the engine hooks in database.py add to it. SQLAlchemy's async greenlets run
+# in the caller's context, so each request sees only its own statements.
+_request_db = contextvars.ContextVar("request_db", default=None)
+
+def record_statement(seconds: float):
+    DB_STATEMENTS.inc()
+    current = _request_db.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += seconds
+
+def request_db_stats():
+    # (statements, seconds) so far in the current request, or None outside one
+    current = _request_db.get()
+    return tuple(current) if current is not None else None
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no per-request task or body buffering
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            # Route template ("/posts/{post_id}"), never the raw path
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            if route != "/metrics":
+                REQUEST_SECONDS.observe(elapsed, scope["method"], route, str(status["code"]))
+                REQUEST_DB_STATEMENTS.observe(db[0], scope["method"], route)
+                REQUEST_DB_SECONDS.observe(db[1], scope["method"], route)
+
+# --- 3. EVENT LOOP LAG ---
+LOOP_LAG_INTERVAL = 0.5
+
+async def watch_loop_lag():
+    # Anything blocking the loop (sync hashing, big JSON, CPU work) shows up here
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        LOOP_LAG_SECONDS.observe(max(loop.time() - start - LOOP_LAG_INTERVAL, 0.0))
@@ -0,0 +1,356 @@
+# backend/migrations.py
+#
+# Versioned schema changes. Run them out-of-band, before the new code starts
+# (Railway: set the pre-deploy command; Heroku-style hosts: the release process):
+#
+#   cd backend && python migrations.py            # upgrade to the latest version
+#   cd backend && python migrations.py --status   # show the current and latest version
+#
+# At startup the app only reads the version (check()) and refuses to serve an
+# older schema. MIGRATE_ON_STARTUP=true upgrades instead, for local development.
+#
+# Databases created by the old create_all-on-boot start at version 0; every
+# step checks what already exists, so they are brought up to date in place.
+# Never edit a released migration: add a new one at the end.
+
+import os
+import asyncio
+import logging
+import argparse
+
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateColumn
+
+import geo
+
+logger = logging.getLogger(__name__)
+
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "false").lower() == "true"
+VERSION_TABLE = "schema_version"
+# Serializes concurrent upgrades on Postgres (two deploys racing)
+ADVISORY_LOCK_KEY = 4_201_337
+BACKFILL_BATCH = 1000
+
+MIGRATIONS = []  # (version, description, fn(sync connection)), in order
+
+def migration(version: int, description: str):
+    def register(fn):
+        assert not MIGRATIONS or MIGRATIONS[-1][0] == version - 1, "migrations must be numbered in order"
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+# --- 1. HELPERS ---
+# Schema operations that skip what is already there. SQLite commits DDL
+# immediately, so a step that failed half-way must be safe to run again.
+def _has_column(conn, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(conn).get_columns(table))
+
+def _has_index(conn, table: str, name: str) -> bool:
+    inspector = sa.inspect(conn)
+    return any(i["name"] == name for i in inspector.get_indexes(table)) or \
+        any(u["name"] == name for u in inspector.get_unique_constraints(table))
+
+def _add_column(conn, table: str, column: sa.Column):
+    if not _has_column(conn, table, column.name):
+        ddl = CreateColumn(column).compile(dialect=conn.dialect)
+        conn.execute(sa.text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+
+def _create_index(conn, name: str, table: str, *columns: str, unique: bool = False, where: str = None):
+    if not _has_index(conn, table, name):
+        conn.execute(sa.text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})"
+            + (f" WHERE {where}" if where else "")
+        ))
+
+def _drop_index(conn, table: str, name: str):
+    if _has_index(conn, table, name):
+        conn.execute(sa.text(f"DROP INDEX {name}"))
+
+# --- 2. MIGRATIONS ---
+@migration(1, "baseline: users, posts, comments, likes")
+def _baseline(conn):
+    # The schema as the first release created it
+    meta = sa.MetaData()
+    sa.Table(
+        "users", meta,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("username", sa.String(50), unique=True, index=True),
+        sa.Column("email", sa.String(100), unique=True, index=True),
+        sa.Column("hashed_password", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("points", sa.Integer),
+    )
+    sa.Table(
+        "posts", meta,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("image_url", sa.String(500), nullable=False),
+        sa.Column("image_public_id", sa.String(255), nullable=False),
+        sa.Column("caption", sa.Text),
+        sa.Column("latitude", sa.Float),
+        sa.Column("longitude", sa.Float),
+        sa.Column("status", sa.Enum("OPEN", "PENDING_VERIFICATION", "COMPLETED", name="taskstatus")),
+        sa.Column("proof_image_url", sa.String(500)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("author_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("resolved_by_id", sa.Integer, sa.ForeignKey("users.id")),
+    )
+    sa.Table(
+        "comments", meta,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("content", sa.Text),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("author_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("post_id", sa.Integer, sa.ForeignKey("posts.id")),
+    )
+    sa.Table(
+        "likes", meta,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("post_id", sa.Integer, sa.ForeignKey("posts.id")),
+    )
+    meta.create_all(conn, checkfirst=True)
+
+@migration(2, "feed index: open tasks by (created_at, id)")
+def _feed_index(conn):
+    # Partial: the feed reads open tasks newest first and stops after one page
+    _create_index(conn, "ix_posts_open_created_at_id", "posts", "created_at", "id", where="status != 'COMPLETED'")
+    # Its full-table predecessor, left behind by create_all
+    _drop_index(conn, "posts", "ix_posts_status_created_at_id")
+
+@migration(3, "index likes by post for the feed's aggregated counts")
+def _likes_post_index(conn):
+    _create_index(conn, "ix_likes_post_id", "likes", "post_id")
+
+@migration(4, "geohash column and index for nearby and bounding-box queries")
+def _geohash(conn):
+    _add_column(conn, "posts", sa.Column("geohash", sa.String(12)))
+    _create_index(conn, "ix_posts_geohash", "posts", "geohash")
+    # Same encoder as the insert default in models.py
+    rows = conn.execute(sa.text(
+        "SELECT id, latitude, longitude FROM posts "
+        "WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL"
+    )).all()
+    for i in range(0, len(rows), BACKFILL_BATCH):
+        conn.execute(
+            sa.text("UPDATE posts SET geohash = :geohash WHERE id = :id"),
+            [{"id": r.id, "geohash": geo.encode(r.latitude, r.longitude)} for r in rows[i:i + BACKFILL_BATCH]]
+        )
+
+@migration(5, "profile list indexes: posts by author and by resolver")
+def _profile_indexes(conn):
+    _create_index(conn, "ix_posts_author_created_at_id", "posts", "author_id", "created_at", "id")
+    _create_index(conn, "ix_posts_resolved_by_created_at_id", "posts", "resolved_by_id", "created_at", "id")
+
+@migration(6, "index users by points for the leaderboard")
+def _points_index(conn):
+    _create_index(conn, "ix_users_points", "users", "points")
+
+@migration(7, "points ledger")
+def _points_ledger(conn):
+    meta = sa.MetaData()
+    # Stand-ins, only so the foreign keys below resolve
+    sa.Table("users", meta, sa.Column("id", sa.Integer, primary_key=True))
+    sa.Table("posts", meta, sa.Column("id", sa.Integer, primary_key=True))
+    ledger = sa.Table(
+        "points_ledger", meta,
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), index=True),
+        sa.Column("post_id", sa.Integer, sa.ForeignKey("posts.id")),
+        sa.Column("delta", sa.Integer, nullable=False),
+        sa.Column("reason", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("post_id", "reason", name="uq_points_ledger_post_reason"),
+    )
+    meta.create_all(conn, tables=[ledger], checkfirst=True)
+
+@migration(8, "one like per user and post, like_count counter")
+def _like_count(conn):
+    # Double taps from before the constraint: keep the first like of each pair
+    conn.execute(sa.text(
+        "DELETE FROM likes WHERE id NOT IN (SELECT MIN(id) FROM likes GROUP BY user_id, post_id)"
+    ))
+    _create_index(conn, "uq_likes_user_post", "likes", "user_id", "post_id", unique=True)
+    _add_column(conn, "posts", sa.Column("like_count", sa.Integer, nullable=False, server_default="0"))
+    conn.execute(sa.text("UPDATE posts SET like_count = (SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"))
+
+@migration(9, "comment_count counter, comments by (post_id, created_at, id)")
+def _comment_count(conn):
+    _add_column(conn, "posts", sa.Column("comment_count", sa.Integer, nullable=False, server_default="0"))
+    conn.execute(sa.text(
+        "UPDATE posts SET comment_count = (SELECT COUNT(*) FROM comments WHERE comments.post_id = posts.id)"
+    ))
+    _create_index(conn, "ix_comments_post_created_at_id", "comments", "post_id", "created_at", "id")
+    # Covered by the composite above, left behind by create_all
+    _drop_index(conn, "comments", "ix_comments_post_id")
+
+@migration(10, "change sequence on posts and comments for /sync")
+def _change_seq(conn):
+    _add_column(conn, "posts", sa.Column("change_seq", sa.BigInteger, nullable=False, server_default="0"))
+    _add_column(conn, "comments", sa.Column("change_seq", sa.BigInteger, nullable=False, server_default="0"))
+    _create_index(conn, "ix_posts_change_seq", "posts", "change_seq")
+    _create_index(conn, "ix_comments_change_seq", "comments", "change_seq")
+    meta = sa.MetaData()
+    counter = sa.Table(
+        "sync_counter", meta,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("value", sa.BigInteger, nullable=False),
+    )
+    meta.create_all(conn, tables=[counter], checkfirst=True)
+
+    # Existing rows get distinct change_seq values below the counter, so the
+    # first /sync from any client sees all of them
+    conn.execute(sa.text("UPDATE posts SET change_seq = id WHERE change_seq = 0"))
+    offset = conn.execute(sa.text("SELECT COALESCE(MAX(change_seq), 0) FROM posts")).scalar()
+    conn.execute(sa.text("UPDATE comments SET change_seq = id + :offset WHERE change_seq = 0"), {"offset": offset})
+    high = conn.execute(sa.text(
+        "SELECT MAX(v) FROM (SELECT COALESCE(MAX(change_seq), 0) AS v FROM posts "
+        "UNION ALL SELECT COALESCE(MAX(change_seq), 0) FROM comments) AS seqs"
+    )).scalar()
+    if conn.execute(sa.text("SELECT 1 FROM sync_counter WHERE id = 1")).first() is None:
+        conn.execute(sa.text("INSERT INTO sync_counter (id, value) VALUES (1, :high)"), {"high": high})
+    else:
+        conn.execute(sa.text("UPDATE sync_counter SET value = :high WHERE id = 1 AND value < :high"), {"high": high})
+
+# Full-text indexes over captions and comments (see search.py): a row per
+# caption in post_search, a row per comment in comment_search, so a write
+# touches one index row however long the thread. Triggers keep them in step
+# with every write path, the ORM and bulk inserts alike.
+_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5("
+        "caption, tokenize = 'porter unicode61 remove_diacritics 2')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS comment_search USING fts5("
+        "content, post_id UNINDEXED, tokenize = 'porter unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS trg_posts_search_insert AFTER INSERT ON posts BEGIN "
+        "INSERT INTO post_search (rowid, caption) VALUES (new.id, new.caption); END",
+        "CREATE TRIGGER IF NOT EXISTS trg_posts_search_update AFTER UPDATE OF caption ON posts BEGIN "
+        "UPDATE post_search SET caption = new.caption WHERE rowid = new.id; END",
+        "CREATE TRIGGER IF NOT EXISTS trg_posts_search_delete AFTER DELETE ON posts BEGIN "
+        "DELETE FROM post_search WHERE rowid = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS trg_comments_search_insert AFTER INSERT ON comments BEGIN "
+        "INSERT INTO comment_search (rowid, content, post_id) VALUES (new.id, new.content, new.post_id); END",
+        "CREATE TRIGGER IF NOT EXISTS trg_comments_search_update AFTER UPDATE OF content, post_id ON comments BEGIN "
+        "UPDATE comment_search SET content = new.content, post_id = new.post_id WHERE rowid = new.id; END",
+        "CREATE TRIGGER IF NOT EXISTS trg_comments_search_delete AFTER DELETE ON comments BEGIN "
+        "DELETE FROM comment_search WHERE rowid = old.id; END",
+        "INSERT INTO post_search (rowid, caption) "
+        "SELECT id, caption FROM posts WHERE id NOT IN (SELECT rowid FROM post_search)",
+        "INSERT INTO comment_search (rowid, content, post_id) "
+        "SELECT id, content, post_id FROM comments WHERE id NOT IN (SELECT rowid FROM comment_search)",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS post_search ("
+        "post_id INTEGER PRIMARY KEY REFERENCES posts (id) ON DELETE CASCADE, "
+        "document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_post_search_document ON post_search USING GIN (document)",
+        "CREATE TABLE IF NOT EXISTS comment_search ("
+        "comment_id INTEGER PRIMARY KEY REFERENCES comments (id) ON DELETE CASCADE, "
+        "post_id INTEGER NOT NULL, "
+        "document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_comment_search_document ON comment_search USING GIN (document)",
+        """CREATE OR REPLACE FUNCTION post_search_refresh() RETURNS TRIGGER AS $$
+        BEGIN
+            -- Deletes cascade from posts and comments
+            IF TG_TABLE_NAME = 'posts' THEN
+                INSERT INTO post_search (post_id, document)
+                VALUES (NEW.id, to_tsvector('english', coalesce(NEW.caption, '')))
+                ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document;
+            ELSE
+                INSERT INTO comment_search (comment_id, post_id, document)
+                VALUES (NEW.id, NEW.post_id, to_tsvector('english', coalesce(NEW.content, '')))
+                ON CONFLICT (comment_id) DO UPDATE SET post_id = EXCLUDED.post_id, document = EXCLUDED.document;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS trg_posts_search ON posts",
+        "CREATE TRIGGER trg_posts_search AFTER INSERT OR UPDATE OF caption ON posts "
+        "FOR EACH ROW EXECUTE FUNCTION post_search_refresh()",
+        "DROP TRIGGER IF EXISTS trg_comments_search ON comments",
+        "CREATE TRIGGER trg_comments_search AFTER INSERT OR UPDATE OF content, post_id ON comments "
+        "FOR EACH ROW EXECUTE FUNCTION post_search_refresh()",
+        "INSERT INTO post_search (post_id, document) "
+        "SELECT id, to_tsvector('english', coalesce(caption, '')) FROM posts ON CONFLICT (post_id) DO NOTHING",
+        "INSERT INTO comment_search (comment_id, post_id, document) "
+        "SELECT id, post_id, to_tsvector('english', coalesce(content, '')) FROM comments ON CONFLICT (comment_id) DO NOTHING",
+    ],
+}
+
+@migration(11, "full-text search index over captions and comments")
+def _post_search(conn):
+    statements = _SEARCH_DDL.get(conn.dialect.name)
+    if statements is None:
+        logger.warning(f"No full-text search support for {conn.dialect.name}; /posts/search will be unavailable.")
+        return
+    for statement in statements:
+        # Driver-level: function bodies contain ':' and '$' that must reach the server untouched
+        conn.exec_driver_sql(statement)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# --- 3. VERSION TRACKING ---
+def _read_version(conn) -> int:
+    if not sa.inspect(conn).has_table(VERSION_TABLE):
+        return 0
+    return conn.execute(sa.text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar() or 0
+
+def _ensure_version_table(conn):
+    conn.execute(sa.text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version INTEGER NOT NULL)"))
+
+def _write_version(conn, version: int):
+    conn.execute(sa.text(f"DELETE FROM {VERSION_TABLE}"))
+    conn.execute(sa.text(f"INSERT INTO {VERSION_TABLE} (version) VALUES (:version)"), {"version": version})
+
+async def current_version(engine) -> int:
+    async with engine.connect() as conn:
+        return await conn.run_sync(_read_version)
+
+async def upgrade(engine) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(_ensure_version_table)
+
+    for version, description, fn in MIGRATIONS:
+        async with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                await conn.execute(sa.text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            # Read under the lock: another process may have just applied it
+            if await conn.run_sync(_read_version) >= version:
+                continue
+            logger.info(f"Applying migration {version}: {description}")
+            await conn.run_sync(fn)
+            await conn.run_sync(_write_version, version)
+    return await current_version(engine)
+
+async def check(engine):
+    # Startup: one small query, no DDL
+    if MIGRATE_ON_STARTUP:
+        await upgrade(engine)
+        return
+    version = await current_version(engine)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, this build needs {LATEST_VERSION}. "
+            f"Run `python migrations.py` first (or set MIGRATE_ON_STARTUP=true for local development)."
+        )
+    if version > LATEST_VERSION:
+        # Normal while a rolling deploy replaces older workers
+        logger.warning(f"Database schema version {version} is newer than this build ({LATEST_VERSION}).")
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Apply database migrations to DATABASE_URL")
+    parser.add_argument("--status", action="store_true", help="Only print the current and latest version")
+    args = parser.parse_args()
+
+    from database import engine
+    try:
+        if args.status:
+            print(f"Schema version {await current_version(engine)} (latest {LATEST_VERSION})")
+        else:
+            print(f"Schema is at version {await upgrade(engine)} (latest {LATEST_VERSION})")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(_main())
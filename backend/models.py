@@ -1,10 +1,11 @@
 # backend/models.py
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Text, Float, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text, literal_column
 from database import Base
 import enum
+import geo
 
 class TaskStatus(str, enum.Enum):
     OPEN = "open"
@@ -21,13 +22,25 @@ class User(Base):
     # is_active REMOVED
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    points = Column(Integer, default=0)
+    points = Column(Integer, default=0, index=True)
     
     posts = relationship("Post", back_populates="author", foreign_keys="Post.author_id")
     contribution_tasks = relationship("Post", back_populates="resolved_by", foreign_keys="Post.resolved_by_id")
     comments = relationship("Comment", back_populates="author")
     likes = relationship("Like", back_populates="user")
 
+def _post_geohash(context):
+    # Computed from the inserted lat/lon, so every insert path keeps it in sync
+    params = context.get_current_parameters()
+    return geo.encode(params.get("latitude"), params.get("longitude"))
+
+# Predicate of the partial feed index. Queries must spell it the same way, as a
+# literal rather than a bound parameter, for the planner to use that index.
+OPEN_TASKS_SQL = f"status != '{TaskStatus.COMPLETED.name}'"
+
+def is_open_task():
+    return Post.status != literal_column(f"'{TaskStatus.COMPLETED.name}'")
+
 class Post(Base):
     __tablename__ = "posts"
 
@@ -38,8 +51,14 @@ class Post(Base):
     caption = Column(Text, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True, index=True, default=_post_geohash)
     
     status = Column(Enum(TaskStatus), default=TaskStatus.OPEN)
+    # Denormalized; kept in step with the likes/comments tables by crud.py
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped from sync_counter on every write that changes what the feed shows (see /sync)
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0", index=True)
     proof_image_url = Column(String(500), nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -53,12 +72,25 @@ class Post(Base):
     comments = relationship("Comment", back_populates="post", cascade="all, delete")
     likes = relationship("Like", back_populates="post", cascade="all, delete")
 
+    __table_args__ = (
+        # Feed keyset: WHERE status != COMPLETED ORDER BY created_at DESC, id DESC.
+        # Partial, so the scan walks open tasks in feed order and stops after a page.
+        Index(
+            "ix_posts_open_created_at_id", "created_at", "id",
+            sqlite_where=text(OPEN_TASKS_SQL), postgresql_where=text(OPEN_TASKS_SQL)
+        ),
+        # Dashboard counts and "my requests" / "my contributions" pages
+        Index("ix_posts_author_created_at_id", "author_id", "created_at", "id"),
+        Index("ix_posts_resolved_by_created_at_id", "resolved_by_id", "created_at", "id"),
+    )
+
 class Comment(Base):
     __tablename__ = "comments"
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0", index=True)
     
     author_id = Column(Integer, ForeignKey("users.id"))
     post_id = Column(Integer, ForeignKey("posts.id"))
@@ -66,13 +98,47 @@ class Comment(Base):
     author = relationship("User", back_populates="comments")
     post = relationship("Post", back_populates="comments")
 
+    __table_args__ = (
+        # Thread pages: WHERE post_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_comments_post_created_at_id", "post_id", "created_at", "id"),
+    )
+
 class Like(Base):
     __tablename__ = "likes"
     
     id = Column(Integer, primary_key=True, index=True)
     
     user_id = Column(Integer, ForeignKey("users.id"))
-    post_id = Column(Integer, ForeignKey("posts.id"))
+    post_id = Column(Integer, ForeignKey("posts.id"), index=True)
     
     user = relationship("User", back_populates="likes")
-    post = relationship("Post", back_populates="likes")
\ No newline at end of file
+    post = relationship("Post", back_populates="likes")
+
+    __table_args__ = (
+        # One like per user per post; also answers "which of these did I like?"
+        UniqueConstraint("user_id", "post_id", name="uq_likes_user_post"),
+    )
+
+class PointsLedger(Base):
+    # Append-only record of every points change; users.points is the running total
+    __tablename__ = "points_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=True)
+    delta = Column(Integer, nullable=False)
+    reason = Column(String(50), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # A task can only pay out once per reason
+        UniqueConstraint("post_id", "reason", name="uq_points_ledger_post_reason"),
+    )
+
+class SyncCounter(Base):
+    # Single row. Writers bump it inside their transaction, which holds the row
+    # lock until commit, so change_seq values become visible in increasing order.
+    __tablename__ = "sync_counter"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
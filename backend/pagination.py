@@ -0,0 +1,57 @@
+# backend/pagination.py
+
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+
+# Response header carrying the cursor for the next page.
+# List endpoints keep returning a plain JSON list so old clients don't break.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# --- 1. OPAQUE CURSORS ---
+# A cursor is just a urlsafe-base64 JSON list. Clients must treat it as opaque.
+def encode_cursor(*values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+# --- 2. KEYSET OVER (created_at, id) ---
+# Newest-first lists are ordered by (created_at DESC, id DESC). The cursor only
+# carries the id of the last row we sent; the row's own created_at is looked up
+# in SQL. That way the timestamp never round-trips through the client, which
+# matters on SQLite where CURRENT_TIMESTAMP is stored at second resolution in a
+# different text format than bound datetime parameters.
+def encode_row_cursor(row) -> str:
+    return encode_cursor(row.id)
+
+def decode_row_cursor(cursor: str) -> int:
+    anchor_id = decode_cursor(cursor)[0]
+    if not isinstance(anchor_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return anchor_id
+
+def newest_first(model):
+    return (model.created_at.desc(), model.id.desc())
+
+def older_than(model, anchor_id: int):
+    anchor_created_at = (
+        select(model.created_at).where(model.id == anchor_id).scalar_subquery()
+    )
+    return tuple_(model.created_at, model.id) < tuple_(anchor_created_at, anchor_id)
+
+def next_cursor(rows: list, limit: int):
+    # A short (or empty) page means we reached the end.
+    if not rows or len(rows) < limit:
+        return None
+    return encode_row_cursor(rows[-1])
@@ -0,0 +1,199 @@
+# backend/profiling.py
+
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+from collections import Counter
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# On-demand profiling of single requests in production.
+#   PROFILE_TOKEN=<secret>     requests sent with "X-Profile: <secret>" are profiled
+#   PROFILE_SAMPLE_RATE=0.001  also profile this share of all requests
+# With neither set the middleware is not installed at all. Otherwise an
+# unprofiled request costs one header lookup and one random().
+# A profiled request gets Server-Timing and X-Profile-* headers, and its stacks
+# are written to PROFILE_DIR as <id>.folded (flamegraph.pl / speedscope) plus
+# <id>.json. Only the work done before the response starts is covered.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+PROFILE_HEADER = b"x-profile"
+ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+MAX_DEPTH = 64
+TOP_FRAMES = 10
+
+# Leaf-first: the first frame that matches decides where a sample's time went
+_CATEGORIES = (
+    ("sql", ("/sqlalchemy/", "/asyncpg/", "/aiosqlite/")),
+    ("serialization", ("/pydantic/", "/pydantic_core/", "serialization.py", "/json/", "fastapi/encoders.py")),
+)
+
+# --- 1. SAMPLER ---
+# A background thread reads the event loop thread's current stack every
+# PROFILE_INTERVAL. Other requests share that thread, so each sample is
+# checked against the running task: only this request's samples get stacks,
+# the rest count as waiting (loop idle on I/O, or busy with other requests).
+class Sampler(threading.Thread):
+    def __init__(self, loop, task):
+        super().__init__(daemon=True, name="request-profiler")
+        self.loop, self.task = loop, task
+        self.loop_thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.categories = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        # The loop thread otherwise holds the GIL for up to 5ms at a time, which
+        # would cap the sample rate; the old interval is restored when we stop
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, PROFILE_INTERVAL))
+        try:
+            while not self._done.wait(PROFILE_INTERVAL):
+                self._sample()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        running = asyncio.current_task(self.loop)
+        if running is None:
+            self.categories["wait_io"] += 1
+            return
+        if running is not self.task:
+            self.categories["wait_other_requests"] += 1
+            return
+
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH and frame.f_code is not _MIDDLEWARE_CODE:
+            stack.append(frame)
+            frame = frame.f_back
+        self.categories[self._category(stack)] += 1
+        self.stacks[";".join(_frame_name(f) for f in reversed(stack))] += 1
+
+    @staticmethod
+    def _category(stack):
+        for f in stack:
+            filename = f.f_code.co_filename
+            for name, markers in _CATEGORIES:
+                if any(marker in filename for marker in markers):
+                    return name
+        return "app"
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_firstlineno})"
+
+# --- 2. SUMMARY ---
+def summarize(sampler: Sampler, wall_seconds: float, db) -> dict:
+    total = sum(sampler.categories.values()) or 1
+    per_sample_ms = wall_seconds * 1000 / total
+    self_time = Counter()
+    for stack, count in sampler.stacks.items():
+        self_time[stack.rsplit(";", 1)[-1]] += count
+    return {
+        "wall_ms": round(wall_seconds * 1000, 2),
+        "samples": total,
+        "breakdown_ms": {name: round(count * per_sample_ms, 2) for name, count in sampler.categories.most_common()},
+        # Measured by the engine hooks, so it includes time the driver spent off the loop
+        "db": {"statements": db[0], "ms": round(db[1] * 1000, 2)} if db else None,
+        "top_frames": [
+            {"frame": frame, "self_ms": round(count * per_sample_ms, 2)}
+            for frame, count in self_time.most_common(TOP_FRAMES)
+        ],
+    }
+
+def _write(profile_id: str, route: str, sampler: Sampler, summary: dict):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, profile_id)
+    with open(f"{base}.folded", "w") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(f"{base}.json", "w") as f:
+        json.dump({"id": profile_id, "route": route, **summary}, f, indent=2)
+
+def _headers(profile_id: str, summary: dict):
+    timing = [f"{name};dur={ms}" for name, ms in summary["breakdown_ms"].items()]
+    if summary["db"]:
+        timing.append(f'db;desc="{summary["db"]["statements"]} statements";dur={summary["db"]["ms"]}')
+    timing.append(f"total;dur={summary['wall_ms']}")
+    top = ", ".join(f"{t['frame']}={t['self_ms']}ms" for t in summary["top_frames"][:3])
+    return [
+        (b"server-timing", ", ".join(timing).encode()),
+        (b"x-profile-id", profile_id.encode()),
+        (b"x-profile-top", top.encode("ascii", "replace")),
+    ]
+
+# --- 3. MIDDLEWARE ---
+_active = threading.Lock()  # One profile at a time per worker; others run unprofiled
+
+def _wanted(scope) -> bool:
+    if PROFILE_TOKEN:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wanted(scope) or not _active.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex[:12]
+        sampler = Sampler(asyncio.get_running_loop(), asyncio.current_task())
+        db_before = metrics.request_db_stats() or (0, 0.0)
+        start = time.perf_counter()
+        sampler.start()
+        stopped, summary = False, None
+
+        async def finish():
+            # Joining the sampler can wait out a sample, so it happens off the loop
+            nonlocal stopped, summary
+            stopped = True
+            try:
+                await asyncio.to_thread(sampler.stop)
+            finally:
+                _active.release()
+            db_after = metrics.request_db_stats()
+            db = (db_after[0] - db_before[0], db_after[1] - db_before[1]) if db_after else None
+            summary = summarize(sampler, time.perf_counter() - start, db)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and not stopped:
+                # Stop at the response head so the numbers can go in the headers
+                await finish()
+                message = {**message, "headers": list(message.get("headers", [])) + _headers(profile_id, summary)}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not stopped:
+                await finish()
+            if summary is not None:
+                # The response is out by now; the files are written off the loop
+                route = f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}"
+                try:
+                    await asyncio.to_thread(_write, profile_id, route, sampler, summary)
+                except OSError as e:
+                    logger.warning(f"Could not write profile {profile_id}: {e}")
+                logger.info(f"Profiled {route} as {profile_id}: {summary['breakdown_ms']}")
+
+# Stacks are cut here, so the server and middleware frames above us are left out
+_MIDDLEWARE_CODE = ProfilingMiddleware.__call__.__code__
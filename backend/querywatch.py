@@ -0,0 +1,148 @@
+# backend/querywatch.py
+
+import os
+import logging
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Opt-in data-access checks for development and tests. Off in production.
+#   QUERY_WATCH=1        log N+1 patterns, slow queries (with their plan) and budget overruns
+#   QUERY_WATCH=strict   same, but a request over its budget raises QueryBudgetExceeded,
+#                        which TestClient / httpx re-raise, so the test fails
+QUERY_WATCH = os.getenv("QUERY_WATCH", "").lower()
+ENABLED = QUERY_WATCH in ("1", "true", "strict")
+STRICT = QUERY_WATCH == "strict"
+QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", "100"))
+# Same statement this many times in one request, with different parameters = N+1
+QUERY_N_PLUS_ONE = int(os.getenv("QUERY_N_PLUS_ONE", "3"))
+
+# Statements each route may run, keyed by "METHOD /route/template".
+# Authenticated routes include one user lookup for a user-cache miss, and
+# writes include creating the sync_counter row on a fresh database.
+# Routes not listed only get the N+1 and slow-query checks.
+ROUTE_BUDGETS = {
+    "GET /posts/": 5,               # user, version stamp, page, latest comments, liked_by_me
+    "GET /posts/nearby": 8,         # a few growing circles until the page is full
+    "GET /posts/in-bbox": 5,
+    "GET /posts/search": 5,
+    "GET /posts/clusters": 2,
+    "GET /posts/{post_id}": 5,
+    "POST /posts/": 10,             # includes the eager re-fetch of the new post
+    "POST /posts/{post_id}/submit-proof": 5,
+    "POST /posts/{post_id}/approve": 7,
+    "PUT /posts/{post_id}/like": 5,
+    "DELETE /posts/{post_id}/like": 5,
+    "GET /comments/": 2,
+    "POST /comments/": 6,
+    "GET /sync/": 6,
+    "GET /users/me": 1,
+    "GET /users/profile/stats": 4,
+    "GET /users/profile/requests": 3,
+    "GET /users/profile/contributions": 3,
+    "GET /users/leaderboard": 1,
+    "GET /users/leaderboard/me": 2,
+    "POST /auth/token": 2,
+    "POST /auth/register": 4,
+}
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+# --- 1. RECORDING ---
+# database.py calls record() from its after_cursor_execute hook when ENABLED.
+# Every open log (the current request's, plus any count_queries() blocks) gets the statement.
+_request_log = contextvars.ContextVar("query_log", default=None)
+_blocks = []
+
+def record(statement: str, parameters, seconds: float):
+    if statement.startswith("EXPLAIN"):
+        return # Our own plan lookups
+    entry = (statement, parameters, seconds)
+    log = _request_log.get()
+    if log is not None:
+        log.append(entry)
+    for block in _blocks:
+        block.append(entry)
+
+@contextmanager
+def count_queries(budget: int = None):
+    # with querywatch.count_queries(budget=4) as queries: client.get("/posts/")
+    # Counts every statement on the engine inside the block, from any task or thread.
+    queries = []
+    _blocks.append(queries)
+    try:
+        yield queries
+    finally:
+        _blocks.remove(queries)
+    if budget is not None and len(queries) > budget:
+        raise QueryBudgetExceeded(f"{len(queries)} statements, budget {budget}:\n" + _listing(queries))
+
+# --- 2. ANALYSIS ---
+def _short(statement: str, width: int = 160) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= width else flat[:width] + "..."
+
+def _listing(queries) -> str:
+    return "\n".join(f"  {i + 1}. ({seconds * 1000:.1f}ms) {_short(statement)}" for i, (statement, _, seconds) in enumerate(queries))
+
+def find_n_plus_one(queries):
+    # [(statement, times run)] for statements repeated with differing parameters
+    runs = defaultdict(list)
+    for statement, parameters, _ in queries:
+        runs[statement].append(repr(parameters))
+    return [
+        (statement, len(params)) for statement, params in runs.items()
+        if len(params) >= QUERY_N_PLUS_ONE and len(set(params)) > 1
+    ]
+
+async def _explain(engine, statement, parameters, dialect):
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        async with engine.connect() as conn:
+            rows = (await conn.exec_driver_sql(prefix + statement, parameters)).all()
+        return "\n".join("    " + " ".join(str(col) for col in row) for row in rows)
+    except Exception as e:
+        return f"    (EXPLAIN failed: {e})"
+
+# --- 3. MIDDLEWARE ---
+class QueryWatchMiddleware:
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        queries = []
+        token = _request_log.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_log.reset(token)
+        await self._report(scope, queries)
+
+    async def _report(self, scope, queries):
+        route = f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}"
+
+        for statement, times in find_n_plus_one(queries):
+            logger.warning(f"Possible N+1 in {route}: ran {times}x: {_short(statement)}")
+
+        # Explained here, on a fresh connection, not inside the statement's own cursor
+        for statement, parameters, seconds in queries:
+            if seconds * 1000 < QUERY_SLOW_MS:
+                continue
+            plan = await _explain(self.engine, statement, parameters, self.engine.dialect.name)
+            logger.warning(f"Slow query in {route} ({seconds * 1000:.1f}ms): {_short(statement, 400)}" + (f"\n{plan}" if plan else ""))
+
+        budget = ROUTE_BUDGETS.get(route)
+        if budget is not None and len(queries) > budget:
+            message = f"{route} ran {len(queries)} statements, budget is {budget}:\n{_listing(queries)}"
+            if STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
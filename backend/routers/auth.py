@@ -12,8 +12,7 @@ from database import get_db
 from auth_utils import (
     authenticate_user, 
     create_access_token, 
-    get_current_active_user,
-    get_password_hash
+    get_current_active_user
 )
 
 router = APIRouter(tags=["Authentication"])
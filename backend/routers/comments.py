@@ -1,12 +1,14 @@
 # backend/routers/comments.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-import schemas, crud
+import schemas, crud, conditional, events
+from serialization import json_response
 from database import get_db
 from auth_utils import get_current_active_user
+from pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
 
 router = APIRouter(
     prefix="/comments",
@@ -21,23 +23,42 @@ async def create_comment(
     db: AsyncSession = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user)
 ):
-    # 1. Verify post exists
-    db_post = await crud.get_post(db, post_id=post_id)
-    if not db_post:
-        raise HTTPException(status_code=404, detail="Post not found")
-
-    # 2. Create comment (FIXED ARGUMENTS)
-    return await crud.create_comment(
+    # Post existence is checked by the insert itself
+    created = await crud.create_comment(
         db=db, 
-        comment=comment,           # Matches crud.py definition
-        user_id=current_user.id,   # Matches crud.py definition (not author_id)
+        comment=comment,
+        author=current_user,
         post_id=post_id
     )
+    if created is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    events.publish(
+        "comment.created",
+        {"post_id": post_id, "comment_id": created["id"], "seq": created["change_seq"]},
+        geohash=created["post_geohash"]
+    )
+    return created
 
 # --- Get Comments for a Post ---
+# Newest first. Pass X-Next-Cursor back as ?cursor= for older ones;
+# X-Total-Count has the thread size. Answers If-None-Match with 304.
 @router.get("/", response_model=List[schemas.Comment])
 async def read_comments(
     post_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db)
 ):
-    return await crud.get_comments_by_post(db, post_id=post_id)
\ No newline at end of file
+    version = await crud.get_comment_thread_version(db, post_id=post_id)
+    not_modified = conditional.check(request, response, version)
+    if not_modified:
+        return not_modified
+
+    comments, cursor_out = await crud.get_comments_by_post(db, post_id=post_id, limit=limit, cursor=cursor)
+    # The version is (change_seq, comment_count, points ledger id), so the total needs no query of its own
+    response.headers[TOTAL_COUNT_HEADER] = str(version[1] if version else 0)
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
+    return json_response(List[schemas.Comment], comments, response)
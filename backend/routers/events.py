@@ -0,0 +1,84 @@
+# backend/routers/events.py
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+import events, geo
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"]
+)
+
+# Both endpoints take the same optional filter:
+#   ?bbox=west,south,east,north   only tasks inside the map view
+#   ?cells=tdr1,tdr4              only tasks inside these geohash cells
+# Events: post.created, post.claimed, post.completed, comment.created.
+# Each one says which post changed and its new seq; fetch the details with
+# GET /sync/?since=<token>. "resync" means we fell behind: do a full /sync/.
+
+def _filter_cells(bbox: Optional[str], cells: Optional[str]):
+    if bbox:
+        return geo.cover_cells(*geo.parse_bbox(bbox), max_precision=events.EVENTS_FILTER_PRECISION)
+    if cells:
+        prefixes = [cell.strip().lower() for cell in cells.split(",") if cell.strip()]
+        if len(prefixes) > geo.MAX_COVER_CELLS or any(
+            len(cell) > geo.GEOHASH_PRECISION or any(ch not in geo.BASE32 for ch in cell) for cell in prefixes
+        ):
+            raise HTTPException(status_code=400, detail="cells must be up to 16 comma-separated geohashes")
+        return prefixes
+    return ()
+
+RESYNC = {"type": "resync", "data": {}}
+
+# --- 1. SERVER-SENT EVENTS ---
+@router.get("")
+async def stream_events(request: Request, bbox: Optional[str] = None, cells: Optional[str] = None):
+    sub = events.subscribe(_filter_cells(bbox, cells))
+
+    async def stream():
+        try:
+            yield events.sse_format(None)
+            while not await request.is_disconnected():
+                try:
+                    event = await sub.next()
+                except ConnectionAbortedError:
+                    yield events.sse_format(RESYNC)
+                    return
+                yield events.sse_format(event)
+        finally:
+            events.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # No proxy buffering
+    )
+
+# --- 2. WEBSOCKET ---
+# Same stream as JSON messages; the heartbeat is {"type": "ping"}.
+@router.websocket("")
+async def websocket_events(websocket: WebSocket, bbox: Optional[str] = None, cells: Optional[str] = None):
+    # Accept first: closing before the handshake reaches the client as a bare
+    # HTTP 403, without the close code that says whether to retry (1013) or not (1008)
+    await websocket.accept()
+    try:
+        sub = events.subscribe(_filter_cells(bbox, cells))
+    except HTTPException as exc:
+        await websocket.close(code=1013 if exc.status_code == 503 else 1008, reason=exc.detail)
+        return
+
+    try:
+        while True:
+            try:
+                event = await sub.next()
+            except ConnectionAbortedError:
+                await websocket.send_json(RESYNC)
+                await websocket.close(code=1013)
+                return
+            await websocket.send_json(event if event is not None else {"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        events.unsubscribe(sub)
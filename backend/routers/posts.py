@@ -1,14 +1,20 @@
 # backend/routers/posts.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+import math
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, update, insert, or_
 from sqlalchemy.orm import selectinload 
-from typing import List
+from typing import List, Optional
 
-import schemas, models
+import schemas, models, crud, geo, clusters, user_cache, leaderboard, conditional, events, search
+from serialization import json_response
 from database import get_db
-from auth_utils import get_current_active_user
+from auth_utils import get_current_active_user, get_optional_user
+from pagination import (
+    NEXT_CURSOR_HEADER, encode_cursor, decode_cursor,
+    decode_row_cursor, newest_first, older_than, next_cursor
+)
 
 router = APIRouter(
     prefix="/posts",
@@ -16,34 +22,52 @@ router = APIRouter(
 )
 
 # --- 1. GET FEED ---
-@router.get("/", response_model=List[schemas.Post])
+# Returns lightweight cards (counts + latest comments). Use GET /posts/{id} for everything.
+# Pass the X-Next-Cursor header of the previous page as ?cursor= to get the next one.
+# Send the last ETag as If-None-Match: any write that could change a card bumps
+# the sync counter, so an unchanged feed is a 304 after one primary-key lookup.
+@router.get("/", response_model=List[schemas.PostSummary])
 async def get_feed(
-    skip: int = 0, 
-    limit: int = 20, 
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    latest_comments: int = Query(3, ge=0, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[schemas.User] = Depends(get_optional_user)
 ):
+    # liked_by_me differs per user, so the user is part of the version
+    version = await crud.current_change_seq(db)
+    not_modified = conditional.check(request, response, version, current_user.id if current_user else None)
+    if not_modified:
+        return not_modified
+
     query = (
         select(models.Post)
-        .options(
-            selectinload(models.Post.author),       
-            selectinload(models.Post.likes),        
-            selectinload(models.Post.comments).selectinload(models.Comment.author), 
-            selectinload(models.Post.resolved_by)   
-        )
-        .where(models.Post.status != models.TaskStatus.COMPLETED)
-        .order_by(desc(models.Post.created_at))
-        .offset(skip)
+        .options(*crud.post_summary_options())
+        .where(models.is_open_task())
+        .order_by(*newest_first(models.Post))
         .limit(limit)
     )
+    if cursor:
+        query = query.where(older_than(models.Post, decode_row_cursor(cursor)))
+
     result = await db.execute(query)
-    return result.scalars().all()
+    posts = result.scalars().all()
+    await crud.attach_latest_comments(db, posts, latest_comments)
+    await crud.attach_liked_by_me(db, posts, current_user.id if current_user else None)
+
+    cursor_out = next_cursor(posts, limit)
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
+    return json_response(List[schemas.PostSummary], posts, response)
 
 # --- 2. CREATE REQUEST (FIXED) ---
 @router.post("/", response_model=schemas.Post, status_code=status.HTTP_201_CREATED)
 async def create_request(
     post_data: schemas.PostCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
 ):
     # 1. Create and Save
     new_post = models.Post(
@@ -56,6 +80,8 @@ async def create_request(
         status=models.TaskStatus.OPEN
     )
     db.add(new_post)
+    await db.flush()
+    await crud.stamp_change_seq(db, models.Post, new_post.id)
     await db.commit()
     await db.refresh(new_post)
     
@@ -74,64 +100,321 @@ async def create_request(
     )
     result = await db.execute(query)
     loaded_post = result.scalars().first()
+    clusters.invalidate(loaded_post.geohash)
+    events.post_event("post.created", loaded_post.id, loaded_post.status, loaded_post.geohash, loaded_post.change_seq)
     
     return loaded_post
 
 # --- 3. SUBMIT PROOF ---
+# Claims are a single conditional UPDATE: of two volunteers racing for the same
+# task, exactly one matches "status = open" and the other gets a 400.
 @router.post("/{post_id}/submit-proof")
 async def submit_proof(
     post_id: int,
     proof_image_url: str, 
     db: AsyncSession = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
 ):
-    result = await db.execute(select(models.Post).where(models.Post.id == post_id))
-    post = result.scalars().first()
-
-    if not post:
-        raise HTTPException(status_code=404, detail="Task not found")
+    claim = (
+        update(models.Post)
+        .where(
+            models.Post.id == post_id,
+            models.Post.status == models.TaskStatus.OPEN,
+            models.Post.author_id != current_user.id
+        )
+        .values(
+            status=models.TaskStatus.PENDING_VERIFICATION,
+            resolved_by_id=current_user.id,
+            proof_image_url=proof_image_url
+        )
+        .returning(models.Post.geohash)
+    )
+    claimed = (await db.execute(claim)).first()
 
-    if post.status != models.TaskStatus.OPEN:
+    if claimed is None:
+        # Nothing changed; load the row only to explain why
+        post = await crud.get_post(db, post_id=post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if post.author_id == current_user.id:
+            raise HTTPException(status_code=400, detail="You cannot claim your own task")
         raise HTTPException(status_code=400, detail="Task is not open for contributions")
-    
-    if post.author_id == current_user.id:
-         raise HTTPException(status_code=400, detail="You cannot claim your own task")
 
-    post.status = models.TaskStatus.PENDING_VERIFICATION
-    post.resolved_by_id = current_user.id
-    post.proof_image_url = proof_image_url
-    
+    seq = await crud.stamp_change_seq(db, models.Post, post_id)
     await db.commit()
+    clusters.invalidate(claimed.geohash)
+    events.post_event("post.claimed", post_id, models.TaskStatus.PENDING_VERIFICATION, claimed.geohash, seq)
     return {"message": "Proof submitted! Waiting for author approval."}
 
 # --- 4. APPROVE & CLOSE ---
+POINTS_PER_TASK = 50
+
 @router.post("/{post_id}/approve")
 async def approve_and_close(
     post_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    close = (
+        update(models.Post)
+        .where(
+            models.Post.id == post_id,
+            models.Post.author_id == current_user.id,
+            models.Post.status == models.TaskStatus.PENDING_VERIFICATION
+        )
+        .values(status=models.TaskStatus.COMPLETED)
+        .returning(models.Post.resolved_by_id, models.Post.geohash)
+    )
+    closed = (await db.execute(close)).first()
+
+    if closed is None:
+        post = await crud.get_post(db, post_id=post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if post.author_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Only the author can approve this")
+        raise HTTPException(status_code=400, detail="No pending proof to approve")
+
+    resolver = None
+    if closed.resolved_by_id:
+        # Ledger row + in-place increment, same transaction as the status change.
+        # "points = points + 50" can't lose a concurrent award the way += in Python did.
+        await db.execute(
+            insert(models.PointsLedger).values(
+                user_id=closed.resolved_by_id,
+                post_id=post_id,
+                delta=POINTS_PER_TASK,
+                reason="task_completed"
+            )
+        )
+        award = (
+            update(models.User)
+            .where(models.User.id == closed.resolved_by_id)
+            .values(points=models.User.points + POINTS_PER_TASK)
+            .returning(models.User.id, models.User.username, models.User.points)
+        )
+        resolver = (await db.execute(award)).first()
+
+    seq = await crud.stamp_change_seq(db, models.Post, post_id)
+    await db.commit()
+    clusters.invalidate(closed.geohash)
+    events.post_event("post.completed", post_id, models.TaskStatus.COMPLETED, closed.geohash, seq)
+    if resolver:
+        user_cache.invalidate_user(resolver.id)
+        leaderboard.set_points(resolver.id, resolver.username, resolver.points)
+    return {"message": "Task approved! Points awarded."}
+
+# --- 5. NEARBY (MAP) ---
+# Searched outward from the centre in growing circles: geohash cells covering
+# each circle are range-scanned on the index, candidates are filtered and ordered
+# by exact haversine distance, and the search stops at the first circle holding
+# a full page beyond the cursor. A page costs about the area it needs, not radius_m.
+# Keyset paging on (distance_m, id) via X-Next-Cursor, like the feed.
+NEARBY_FIRST_RING_M = 500
+
+async def _nearby_page(db: AsyncSession, lat: float, lon: float, radius_m: float, limit: int, after):
+    reach = min(max(after[0] * 2 if after else 0, NEARBY_FIRST_RING_M), radius_m)
+    while True:
+        west, south, east, north = geo.radius_bbox(lat, lon, reach)
+        # Candidates are id + coordinates only; full rows are loaded for the page alone.
+        query = (
+            select(models.Post.id, models.Post.latitude, models.Post.longitude)
+            .where(models.Post.status != models.TaskStatus.COMPLETED)
+            .where(or_(*geo.prefix_ranges(models.Post.geohash, geo.cover_cells(west, south, east, north))))
+            .where(models.Post.latitude.between(south, north))
+            .where(models.Post.longitude.between(west, east))
+        )
+        candidates = []
+        for post_id, post_lat, post_lon in (await db.execute(query)).all():
+            distance = geo.haversine_m(lat, lon, post_lat, post_lon)
+            if distance <= reach and (after is None or (distance, post_id) > after):
+                candidates.append((distance, post_id))
+        # Everything within reach has been seen, so a full page here is the nearest one
+        if len(candidates) >= limit or reach >= radius_m:
+            return sorted(candidates)[:limit]
+        # Size the next circle for a full page at the density seen so far;
+        # nothing at all means the area is sparse, so go straight to radius_m
+        growth = max(2.0, 1.5 * math.sqrt(limit / len(candidates))) if candidates else radius_m / reach
+        reach = min(reach * growth, radius_m)
+
+@router.get("/nearby", response_model=List[schemas.NearbyPost])
+async def get_nearby(
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(2000, gt=0, le=50_000),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    latest_comments: int = Query(3, ge=0, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[schemas.User] = Depends(get_optional_user)
+):
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if len(after) != 2 or not all(isinstance(v, (int, float)) for v in after):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = tuple(after)
+    page = await _nearby_page(db, lat, lon, radius_m, limit, after)
+
+    posts = []
+    if page:
+        result = await db.execute(
+            select(models.Post)
+            .options(*crud.post_summary_options())
+            .where(models.Post.id.in_([post_id for _, post_id in page]))
+        )
+        by_id = {post.id: post for post in result.scalars().all()}
+        for distance, post_id in page:
+            post = by_id[post_id]
+            post.distance_m = round(distance, 1) # Plain attribute, read by NearbyPost
+            posts.append(post)
+        await crud.attach_latest_comments(db, posts, latest_comments)
+        await crud.attach_liked_by_me(db, posts, current_user.id if current_user else None)
+
+    if len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*page[-1])
+    return json_response(List[schemas.NearbyPost], posts, response)
+
+# --- 6. IN BOUNDING BOX (MAP) ---
+# bbox is "west,south,east,north". Newest first, same cursor scheme as the feed.
+@router.get("/in-bbox", response_model=List[schemas.PostSummary])
+async def get_in_bbox(
+    response: Response,
+    bbox: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    latest_comments: int = Query(0, ge=0, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[schemas.User] = Depends(get_optional_user)
 ):
+    west, south, east, north = geo.parse_bbox(bbox)
     query = (
         select(models.Post)
-        .options(selectinload(models.Post.resolved_by)) 
-        .where(models.Post.id == post_id)
+        .options(*crud.post_summary_options())
+        .where(models.Post.status != models.TaskStatus.COMPLETED)
+        .where(or_(*geo.prefix_ranges(models.Post.geohash, geo.cover_cells(west, south, east, north))))
+        .where(models.Post.latitude.between(south, north))
+        .where(models.Post.longitude.between(west, east))
+        .order_by(*newest_first(models.Post))
+        .limit(limit)
     )
+    if cursor:
+        query = query.where(older_than(models.Post, decode_row_cursor(cursor)))
+
     result = await db.execute(query)
-    post = result.scalars().first()
+    posts = result.scalars().all()
+    await crud.attach_latest_comments(db, posts, latest_comments)
+    await crud.attach_liked_by_me(db, posts, current_user.id if current_user else None)
 
-    if not post:
+    cursor_out = next_cursor(posts, limit)
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
+    return json_response(List[schemas.PostSummary], posts, response)
+
+# --- 7. MAP CLUSTERS ---
+# Zoomed-out map markers: per-cell counts/centroids, single points for sparse cells.
+@router.get("/clusters", response_model=schemas.ClusterResponse)
+async def get_clusters(
+    bbox: str,
+    zoom: int = Query(..., ge=0, le=22),
+    db: AsyncSession = Depends(get_db)
+):
+    west, south, east, north = geo.parse_bbox(bbox)
+    return await clusters.get_clusters(db, west, south, east, north, zoom)
+
+# --- 8. LIKE / UNLIKE ---
+# Idempotent: PUT twice is still one like, DELETE twice is still none.
+@router.put("/{post_id}/like", response_model=schemas.LikeStatus)
+async def like_post(
+    post_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    like_count = await crud.like_post(db, user_id=current_user.id, post_id=post_id)
+    if like_count is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    return {"post_id": post_id, "liked": True, "like_count": like_count}
 
-    if post.author_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Only the author can approve this")
+@router.delete("/{post_id}/like", response_model=schemas.LikeStatus)
+async def unlike_post(
+    post_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    like_count = await crud.unlike_post(db, user_id=current_user.id, post_id=post_id)
+    if like_count is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"post_id": post_id, "liked": False, "like_count": like_count}
 
-    if post.status != models.TaskStatus.PENDING_VERIFICATION:
-        raise HTTPException(status_code=400, detail="No pending proof to approve")
+# --- 9. SEARCH ---
+# Full-text over captions and comments, best match first (see search.py).
+# Optional status and bbox filters; keyset paging on (score, id) via X-Next-Cursor.
+# X-Search-Truncated: true means only the newest matches were ranked; narrow
+# the search with status or bbox to reach older ones.
+@router.get("/search", response_model=List[schemas.PostSummary])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[models.TaskStatus] = None,
+    bbox: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    latest_comments: int = Query(3, ge=0, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[schemas.User] = Depends(get_optional_user)
+):
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if len(after) != 2 or not isinstance(after[0], (int, float)) or not isinstance(after[1], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    query, params = search.search_page(
+        db.get_bind().dialect.name, q, limit, status=status,
+        bbox=geo.parse_bbox(bbox) if bbox else None, after=after
+    )
+    rows = (await db.execute(query, params)).all()
+    page = [row for row in rows if row.post_id is not None]
+    if rows and rows[0].truncated:
+        response.headers[search.TRUNCATED_HEADER] = "true"
 
-    if post.resolved_by:
-        post.resolved_by.points += 50
-    
-    post.status = models.TaskStatus.COMPLETED
-    
-    await db.commit()
-    return {"message": "Task approved! Points awarded."}
\ No newline at end of file
+    posts = []
+    if page:
+        result = await db.execute(
+            select(models.Post)
+            .options(*crud.post_summary_options())
+            .where(models.Post.id.in_([row.post_id for row in page]))
+        )
+        by_id = {post.id: post for post in result.scalars().all()}
+        posts = [by_id[row.post_id] for row in page]
+        await crud.attach_latest_comments(db, posts, latest_comments)
+        await crud.attach_liked_by_me(db, posts, current_user.id if current_user else None)
+
+    if len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page[-1].score, page[-1].post_id)
+    return json_response(List[schemas.PostSummary], posts, response)
+
+# --- 10. POST DETAIL ---
+# Full post with every comment and like. Keep this route last: "/{post_id}"
+# would otherwise swallow fixed paths like "/nearby".
+@router.get("/{post_id}", response_model=schemas.Post)
+async def get_post_detail(
+    post_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    query = (
+        select(models.Post)
+        .options(
+            selectinload(models.Post.author),
+            selectinload(models.Post.likes),
+            selectinload(models.Post.comments).selectinload(models.Comment.author),
+            selectinload(models.Post.resolved_by)
+        )
+        .where(models.Post.id == post_id)
+    )
+    result = await db.execute(query)
+    post = result.scalars().first()
+
+    if not post:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return post
@@ -0,0 +1,83 @@
+# backend/routers/sync.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from typing import Optional
+
+import schemas, models, crud
+from database import get_db
+from auth_utils import get_optional_user
+from pagination import encode_cursor, decode_cursor
+from serialization import json_response
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"]
+)
+
+# --- INCREMENTAL SYNC ---
+# Every write stamps the rows it touches with the next value of sync_counter
+# (crud.next_change_seq). A token is just a position in that sequence.
+#   1. Call without ?since= to get a starting token, then load the feed as usual.
+#   2. On refresh, call with the last token. You get only what changed after it:
+#      - posts:            created or changed and still in the feed
+#      - removed_post_ids: tasks that left the feed (completed)
+#      - comments:         new comments on any post
+#   3. Keep calling with the returned token while has_more is true.
+@router.get("/", response_model=schemas.SyncResponse)
+async def sync(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[schemas.User] = Depends(get_optional_user)
+):
+    # Read the high-water mark first. Writers hold the counter row until they
+    # commit, so every change at or below it is already visible to the queries below.
+    high = await crud.current_change_seq(db)
+
+    if not since:
+        return {"token": encode_cursor(high), "has_more": False}
+
+    since_seq = decode_cursor(since)[0]
+    if not isinstance(since_seq, int):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    post_q = (
+        select(models.Post)
+        .options(*crud.post_summary_options())
+        .where(models.Post.change_seq > since_seq, models.Post.change_seq <= high)
+        .order_by(models.Post.change_seq)
+        .limit(limit)
+    )
+    comment_q = (
+        select(models.Comment)
+        .options(joinedload(models.Comment.author))
+        .where(models.Comment.change_seq > since_seq, models.Comment.change_seq <= high)
+        .order_by(models.Comment.change_seq)
+        .limit(limit)
+    )
+    posts = (await db.execute(post_q)).scalars().all()
+    comments = (await db.execute(comment_q)).scalars().all()
+
+    # If either list was cut off, only hand out what's below the cut on both,
+    # so the next call picks up exactly where this one stopped.
+    upto = high
+    cuts = [rows[-1].change_seq for rows in (posts, comments) if len(rows) == limit]
+    if cuts:
+        upto = min(cuts)
+        posts = [p for p in posts if p.change_seq <= upto]
+        comments = [c for c in comments if c.change_seq <= upto]
+
+    live = [p for p in posts if p.status != models.TaskStatus.COMPLETED]
+    await crud.attach_latest_comments(db, live, 0)
+    await crud.attach_liked_by_me(db, live, current_user.id if current_user else None)
+
+    return json_response(schemas.SyncResponse, {
+        "token": encode_cursor(upto),
+        "has_more": bool(cuts),
+        "posts": live,
+        "removed_post_ids": [p.id for p in posts if p.status == models.TaskStatus.COMPLETED],
+        "comments": comments,
+    })
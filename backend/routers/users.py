@@ -1,48 +1,74 @@
 # backend/routers/users.py
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
-from typing import List
+from sqlalchemy import select, func, or_
+from typing import List, Optional
 
-import schemas, models
+import schemas, models, crud, leaderboard, conditional
 from database import get_db
 from auth_utils import get_current_active_user
+from pagination import NEXT_CURSOR_HEADER, decode_row_cursor, newest_first, older_than, next_cursor
 
 router = APIRouter(
     prefix="/users",
     tags=["Users"]
 )
 
+DASHBOARD_PAGE_SIZE = 10
+
+async def _my_posts(db: AsyncSession, column, user_id: int, limit: int, cursor: Optional[str] = None):
+    # One page of posts where `column` (author_id / resolved_by_id) is the user
+    query = (
+        select(models.Post)
+        .options(*crud.post_summary_options())
+        .where(column == user_id)
+        .order_by(*newest_first(models.Post))
+        .limit(limit)
+    )
+    if cursor:
+        query = query.where(older_than(models.Post, decode_row_cursor(cursor)))
+    posts = (await db.execute(query)).scalars().all()
+    await crud.attach_latest_comments(db, posts, 0)
+    return posts, next_cursor(posts, limit)
+
 # --- 1. PRIVATE PROFILE (Settings Page) ---
 # Returns email and full details. Only for the user themselves.
 @router.get("/me", response_model=schemas.User)
-async def read_users_me(current_user: models.User = Depends(get_current_active_user)):
+async def read_users_me(current_user: schemas.User = Depends(get_current_active_user)):
     return current_user
 
 # --- 2. DASHBOARD (Home Screen) ---
 # Returns only safe public info + game stats.
-@router.get("/profile/stats")
+@router.get("/profile/stats", response_model=schemas.DashboardStats)
 async def get_my_stats(
     db: AsyncSession = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
 ):
-    # 1. Tasks I created
-    created_q = select(func.count()).where(models.Post.author_id == current_user.id)
-    created_res = await db.execute(created_q)
-    created_count = created_res.scalar()
+    Post = models.Post
+    mine = Post.author_id == current_user.id
+    solved = Post.resolved_by_id == current_user.id
 
-    # 2. Tasks I solved (Contributions)
-    solved_q = select(func.count()).where(models.Post.resolved_by_id == current_user.id)
-    solved_res = await db.execute(solved_q)
-    solved_count = solved_res.scalar()
+    # 1. Every count in one pass over the user's own rows (both indexes, OR'd)
+    counts_q = (
+        select(
+            func.count().filter(mine),
+            func.count().filter(solved),
+            func.count().filter(mine, Post.status == models.TaskStatus.OPEN),
+            func.count().filter(mine, Post.status == models.TaskStatus.PENDING_VERIFICATION),
+            func.count().filter(mine, Post.status == models.TaskStatus.COMPLETED),
+            func.count().filter(solved, Post.status == models.TaskStatus.PENDING_VERIFICATION),
+            func.count().filter(solved, Post.status == models.TaskStatus.COMPLETED),
+        )
+        .where(or_(mine, solved))
+    )
+    (created_count, solved_count,
+     created_open, created_pending, created_completed,
+     solved_pending, solved_completed) = (await db.execute(counts_q)).one()
 
-    # 3. Get the actual lists
-    my_requests_q = select(models.Post).where(models.Post.author_id == current_user.id).order_by(desc(models.Post.created_at))
-    my_contribs_q = select(models.Post).where(models.Post.resolved_by_id == current_user.id).order_by(desc(models.Post.created_at))
-    
-    my_requests = (await db.execute(my_requests_q)).scalars().all()
-    my_contribs = (await db.execute(my_contribs_q)).scalars().all()
+    # 2. First page of each list; the rest is paged on demand
+    my_requests, requests_cursor = await _my_posts(db, Post.author_id, current_user.id, DASHBOARD_PAGE_SIZE)
+    my_contribs, contribs_cursor = await _my_posts(db, Post.resolved_by_id, current_user.id, DASHBOARD_PAGE_SIZE)
 
     return {
         # --- FIX: FILTER SENSITIVE DATA ---
@@ -53,16 +79,74 @@ async def get_my_stats(
         "counts": {
             "created": created_count,
             "solved": solved_count,
-            "points": current_user.points
+            "points": current_user.points,
+            "created_by_status": {
+                "open": created_open,
+                "pending": created_pending,
+                "completed": created_completed,
+            },
+            "solved_by_status": {
+                "pending": solved_pending,
+                "completed": solved_completed,
+            },
         },
         "my_requests": my_requests,
-        "my_contributions": my_contribs
+        "my_requests_next_cursor": requests_cursor,
+        "my_contributions": my_contribs,
+        "my_contributions_next_cursor": contribs_cursor,
     }
 
+@router.get("/profile/requests", response_model=List[schemas.PostSummary])
+async def get_my_requests(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DASHBOARD_PAGE_SIZE, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    posts, cursor_out = await _my_posts(db, models.Post.author_id, current_user.id, limit, cursor)
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
+    return posts
+
+@router.get("/profile/contributions", response_model=List[schemas.PostSummary])
+async def get_my_contributions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DASHBOARD_PAGE_SIZE, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    posts, cursor_out = await _my_posts(db, models.Post.resolved_by_id, current_user.id, limit, cursor)
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
+    return posts
+
 # --- 3. LEADERBOARD ---
-@router.get("/leaderboard", response_model=List[schemas.UserPublic])
-async def get_leaderboard(db: AsyncSession = Depends(get_db)):
-    # Fetch top 10 users by points
-    query = select(models.User).order_by(desc(models.User.points)).limit(10)
-    result = await db.execute(query)
-    return result.scalars().all()
\ No newline at end of file
+# Served from the in-memory ranking (leaderboard.py); the DB is only read on refresh.
+@router.get("/leaderboard", response_model=List[schemas.LeaderboardEntry])
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    await leaderboard.ensure_loaded(db)
+    not_modified = conditional.check(request, response, leaderboard.top_version(limit))
+    if not_modified:
+        return not_modified
+    return leaderboard.top(limit)
+
+@router.get("/leaderboard/me", response_model=schemas.LeaderboardPosition)
+async def get_my_rank(
+    neighbours: int = Query(2, ge=0, le=25),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    await leaderboard.ensure_loaded(db)
+    position = leaderboard.around(current_user.id, neighbours)
+    if position is None:
+        # Registered after the last refresh on another worker
+        leaderboard.set_points(current_user.id, current_user.username, current_user.points)
+        position = leaderboard.around(current_user.id, neighbours)
+    return position
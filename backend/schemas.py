@@ -1,9 +1,10 @@
 # backend/schemas.py
 
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, computed_field
+from typing import Optional, List, Dict
 from datetime import datetime
 from models import TaskStatus
+import storage
 
 class Token(BaseModel):
     access_token: str
@@ -27,6 +28,16 @@ class UserPublic(BaseModel):
     class Config:
         from_attributes = True
 
+class LeaderboardEntry(UserPublic):
+    rank: int
+
+class LeaderboardPosition(BaseModel):
+    rank: int
+    total_users: int
+    user: LeaderboardEntry
+    above: List[LeaderboardEntry] = []  # Best first, ends just above the user
+    below: List[LeaderboardEntry] = []
+
 # FULL User Schema (For /me endpoint)
 class User(UserBase):
     id: int
@@ -59,6 +70,11 @@ class Like(BaseModel):
     class Config:
         from_attributes = True
 
+class LikeStatus(BaseModel):
+    post_id: int
+    liked: bool
+    like_count: int
+
 # --- Post ---
 class PostBase(BaseModel):
     image_url: str
@@ -70,7 +86,14 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     pass
 
-class Post(PostBase):
+# Adds {"thumb", "medium", "full"} URLs so list cells can fetch the thumbnail
+class PostImages(PostBase):
+    @computed_field
+    @property
+    def image_variants(self) -> Dict[str, str]:
+        return storage.variant_urls(self.image_url)
+
+class Post(PostImages):
     id: int
     status: TaskStatus
     proof_image_url: Optional[str] = None
@@ -81,8 +104,81 @@ class Post(PostBase):
     author: Optional[UserPublic] = None     # Use safe user
     resolved_by: Optional[UserPublic] = None # Use safe user
     
+    like_count: int = 0
+    comment_count: int = 0
     comments: List[Comment] = []
     likes: List[Like] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Feed card: counts + a short comment preview instead of the full child lists.
+# Full detail lives on GET /posts/{id}.
+class PostSummary(PostImages):
+    id: int
+    status: TaskStatus
+    proof_image_url: Optional[str] = None
+    created_at: datetime
+    author_id: int
+    resolved_by_id: Optional[int] = None
+
+    author: Optional[UserPublic] = None
+    resolved_by: Optional[UserPublic] = None
+
+    like_count: int = 0
+    comment_count: int = 0
+    liked_by_me: bool = False    # Always false for anonymous requests
+    comments: List[Comment] = [] # Latest few only, newest first
+
+    class Config:
+        from_attributes = True
+
+class NearbyPost(PostSummary):
+    distance_m: float
+
+# --- Map clusters ---
+class ClusterCell(BaseModel):
+    cell: str       # Geohash prefix
+    count: int
+    latitude: float # Centroid
+    longitude: float
+    open: int
+    pending: int
+
+class MapPoint(BaseModel):
+    id: int
+    latitude: float
+    longitude: float
+    status: TaskStatus
+
+class ClusterResponse(BaseModel):
+    zoom: int
+    precision: int
+    clusters: List[ClusterCell] = []
+    points: List[MapPoint] = []
+    truncated: bool = False # More than clusters.MAX_POINTS points were in view
+
+# --- Dashboard ---
+class DashboardCounts(BaseModel):
+    created: int
+    solved: int    # Includes tasks still waiting for approval
+    points: int
+    created_by_status: Dict[str, int]
+    solved_by_status: Dict[str, int]
+
+class DashboardStats(BaseModel):
+    user: UserPublic
+    counts: DashboardCounts
+    # First page only; fetch more from /users/profile/requests|contributions?cursor=
+    my_requests: List[PostSummary] = []
+    my_requests_next_cursor: Optional[str] = None
+    my_contributions: List[PostSummary] = []
+    my_contributions_next_cursor: Optional[str] = None
+
+# --- Sync ---
+class SyncResponse(BaseModel):
+    token: str      # Pass back as ?since= next time
+    has_more: bool
+    posts: List[PostSummary] = []
+    removed_post_ids: List[int] = []
+    comments: List[Comment] = []
@@ -0,0 +1,166 @@
+# backend/search.py
+
+import os
+import re
+from functools import lru_cache
+from fastapi import HTTPException
+from sqlalchemy import select, func, table, column, literal, literal_column, bindparam, tuple_, or_, case, distinct, union_all, true, String
+
+import models, geo
+
+# Full-text search over each post's caption plus its comments. Two indexes,
+# created and kept current by migration 3 (see migrations.py): post_search has a
+# row per caption, comment_search a row per comment with its post id. FTS5 on
+# SQLite, tsvectors with GIN indexes on Postgres.
+MAX_TERMS = 8
+# Relevance is scored for the newest this-many matches per query only, shared
+# evenly between the words and the two indexes. Scoring costs a few microseconds
+# per match, so a word found in half of a million posts would otherwise take
+# seconds; rarer words are unaffected.
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "2000"))
+# Sent as "true" when some word had more matches than were scored, so older
+# matches may be missing from the results
+TRUNCATED_HEADER = "X-Search-Truncated"
+# A caption match counts this many times more than a comment match
+CAPTION_WEIGHT, COMMENTS_WEIGHT = 4.0, 1.0
+_WORD = re.compile(r"\w+")
+
+# --- 1. QUERY TEXT ---
+# Only words reach the engine, so user input can never be a syntax error.
+def terms(q: str) -> list:
+    words = _WORD.findall(q.lower())[:MAX_TERMS]
+    if not words:
+        raise HTTPException(status_code=400, detail="Search needs at least one word")
+    return words
+
+def _word_query(dialect: str, word: str, prefix: bool) -> str:
+    if dialect == "sqlite":
+        return f'"{word}"' + ("*" if prefix else "")
+    return word + (":*" if prefix else "")
+
+# --- 2. RANKED MATCHES ---
+# One query per index and word: (post_id, term, score) for its newest matches,
+# ordered on the index's own key so the scan can stop early. A LOWER score is a
+# better match whatever the database, so keyset paging is always
+# "(score, id) greater than".
+def _indexes(dialect: str):
+    # (index, post id column, key column, weight), captions first
+    if dialect == "sqlite":
+        captions = table("post_search", column("rowid"))
+        comments = table("comment_search", column("rowid"), column("post_id"))
+        return [
+            (captions, captions.c.rowid, captions.c.rowid, CAPTION_WEIGHT),
+            (comments, comments.c.post_id, comments.c.rowid, COMMENTS_WEIGHT),
+        ]
+    if dialect == "postgresql":
+        captions = table("post_search", column("post_id"), column("document"))
+        comments = table("comment_search", column("comment_id"), column("post_id"), column("document"))
+        return [
+            (captions, captions.c.post_id, captions.c.post_id, CAPTION_WEIGHT),
+            (comments, comments.c.post_id, comments.c.comment_id, COMMENTS_WEIGHT),
+        ]
+    raise HTTPException(status_code=501, detail="Search is not available on this database")
+
+def _term_matches(dialect: str, index, post_id, key, weight: float, term: int):
+    word = bindparam(f"word_{term}", type_=String)
+    if dialect == "sqlite":
+        fts = literal_column(index.name)
+        score = func.bm25(fts) * weight
+        match = fts.op("MATCH")(word)
+    else:
+        query = func.to_tsquery("english", word)
+        score = -func.ts_rank_cd(index.c.document, query) * weight
+        match = index.c.document.op("@@")(query)
+    return (
+        select(post_id.label("post_id"), literal(term).label("term"), score.label("score"))
+        .select_from(index).where(match).order_by(key.desc())
+    )
+
+def _required_terms(dialect: str, words: int):
+    if dialect == "postgresql":
+        # Stop words ("the") become empty tsqueries that match nothing; don't require them
+        return sum(
+            case((func.numnode(func.to_tsquery("english", bindparam(f"word_{term}", type_=String))) > 0, 1), else_=0)
+            for term in range(words)
+        )
+    return words
+
+# The statement depends only on the query's shape; values are bound per request.
+# Building it is several times the cost of running it on a small index.
+@lru_cache(maxsize=256)
+def _statement(dialect: str, words: int, status: bool, cells: int, paged: bool):
+    filters = []
+    if status:
+        filters.append(models.Post.status == bindparam("status"))
+    if cells:
+        filters += [
+            or_(*geo.prefix_ranges(models.Post.geohash, [bindparam(f"cell_{i}", type_=String) for i in range(cells)])),
+            models.Post.latitude.between(bindparam("south"), bindparam("north")),
+            models.Post.longitude.between(bindparam("west"), bindparam("east")),
+        ]
+
+    parts = []
+    indexes = _indexes(dialect)
+    per_part = max(SEARCH_MAX_CANDIDATES // (len(indexes) * words), 1)
+    for source, (index, post_id, key, weight) in enumerate(indexes):
+        best = []
+        for term in range(words):
+            query = _term_matches(dialect, index, post_id, key, weight, term)
+            if filters:
+                # The posts table is only joined when a filter needs its columns
+                query = query.join(models.Post, models.Post.id == post_id).where(*filters)
+            best.append(select(query.limit(per_part).subquery()))
+        # A word counts once per index, by its best match, so a long thread
+        # repeating a word doesn't outrank a caption by sheer volume
+        matched = union_all(*best).subquery()
+        parts.append(
+            select(
+                literal(source).label("source"), matched.c.post_id, matched.c.term,
+                func.min(matched.c.score).label("score"), func.count().label("rows")
+            )
+            .group_by(matched.c.post_id, matched.c.term)
+        )
+
+    # A post matches when every word is found in its caption or any of its
+    # comments; its score adds up the best caption and comment match of each word
+    matches = union_all(*parts).cte("matches")
+    ranked = (
+        select(matches.c.post_id, func.sum(matches.c.score).label("score"))
+        .group_by(matches.c.post_id)
+        .having(func.count(distinct(matches.c.term)) == _required_terms(dialect, words))
+        .subquery()
+    )
+    # Ranked in a subquery so the keyset condition compares the computed score
+    page = select(ranked.c.post_id, ranked.c.score).order_by(ranked.c.score, ranked.c.post_id).limit(bindparam("limit"))
+    if paged:
+        page = page.where(tuple_(ranked.c.score, ranked.c.post_id) > tuple_(bindparam("after_score"), bindparam("after_id")))
+    page = page.subquery()
+
+    # A scan that returned its full share may have stopped short of older matches
+    scanned = select(func.sum(matches.c.rows).label("rows")).group_by(matches.c.source, matches.c.term).subquery()
+    truncated = select((func.coalesce(func.max(scanned.c.rows), 0) >= per_part).label("truncated")).subquery()
+    # Outer join, so the flag comes back even when the page is empty (post_id NULL)
+    return (
+        select(page.c.post_id, page.c.score, truncated.c.truncated)
+        .select_from(truncated.outerjoin(page, true()))
+        .order_by(page.c.score, page.c.post_id)
+    )
+
+def search_page(dialect: str, q: str, limit: int, status=None, bbox=None, after=None):
+    # Returns (statement, parameters). Rows are (post_id, score, truncated); an
+    # empty page is a single row with post_id None.
+    # bbox = (west, south, east, north); after = (score, post_id) of the previous page's last row
+    words = terms(q)
+    # The last word also matches as a prefix (search as you type)
+    params = {f"word_{i}": _word_query(dialect, w, i == len(words) - 1) for i, w in enumerate(words)}
+    params["limit"] = limit
+    cells = ()
+    if status is not None:
+        params["status"] = status
+    if bbox is not None:
+        west, south, east, north = bbox
+        cells = geo.cover_cells(west, south, east, north)
+        params.update({f"cell_{i}": cell for i, cell in enumerate(cells)}, west=west, south=south, east=east, north=north)
+    if after is not None:
+        params["after_score"], params["after_id"] = after
+    return _statement(dialect, len(words), status is not None, len(cells), after is not None), params
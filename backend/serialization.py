@@ -0,0 +1,76 @@
+# backend/serialization.py
+
+import typing
+from functools import lru_cache
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# Fast path for hot list endpoints.
+# With response_model alone, FastAPI validates the ORM objects attribute by
+# attribute (every read goes through SQLAlchemy's instrumented descriptors),
+# dumps the models back to Python dicts, then runs those through json.dumps.
+# Here the loaded values are copied into plain dicts straight from each row's
+# state, validated once by a prebuilt TypeAdapter and written as JSON bytes by
+# pydantic-core. Keep response_model on the route: it still drives the docs.
+
+@lru_cache(maxsize=None)
+def adapter(tp) -> TypeAdapter:
+    # Building an adapter compiles the schema; do it once per type
+    return TypeAdapter(tp)
+
+def _nested_model(annotation):
+    # UserPublic out of Optional[UserPublic] / List[Comment] / ...
+    for arg in (annotation, *typing.get_args(annotation)):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg
+        nested = next((a for a in typing.get_args(arg) if isinstance(a, type) and issubclass(a, BaseModel)), None)
+        if nested is not None:
+            return nested
+    return None
+
+@lru_cache(maxsize=None)
+def _plan(model):
+    # (field name, plan of the nested model or None), worked out once per schema
+    plan = []
+    for name, field in model.model_fields.items():
+        nested = _nested_model(field.annotation)
+        plan.append((name, _plan(nested) if nested else None))
+    return tuple(plan)
+
+def _row(obj, plan) -> dict:
+    # Loaded ORM values live in obj.__dict__; anything not there (unloaded or
+    # not an ORM object) falls back to a normal attribute read.
+    values = obj if isinstance(obj, dict) else obj.__dict__
+    row = {}
+    for name, nested in plan:
+        value = values[name] if name in values else getattr(obj, name, None)
+        if nested is not None and value is not None:
+            value = [_row(item, nested) for item in value] if isinstance(value, list) else _row(value, nested)
+        row[name] = value
+    return row
+
+def to_rows(tp, data):
+    # List[Model] -> list of dicts, Model -> dict
+    if typing.get_origin(tp) in (list, typing.List):
+        plan = _plan(typing.get_args(tp)[0])
+        return [_row(item, plan) for item in data]
+    return _row(data, _plan(tp))
+
+class PydanticJSONResponse(Response):
+    # Body is already JSON bytes; render() just passes it through
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content
+
+def dump_json(tp, data) -> bytes:
+    ta = adapter(tp)
+    return ta.dump_json(ta.validate_python(to_rows(tp, data)))
+
+def json_response(tp, data, response: Response = None, status_code: int = 200) -> PydanticJSONResponse:
+    # Returning a Response skips FastAPI's own serialization, and also the
+    # headers set on the injected `response`, so those are carried over here.
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        headers.pop("content-length", None)
+    return PydanticJSONResponse(dump_json(tp, data), status_code=status_code, headers=headers)
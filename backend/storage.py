@@ -0,0 +1,157 @@
+# backend/storage.py
+
+import os
+import io
+import re
+import asyncio
+import logging
+import urllib.request
+from collections import OrderedDict
+from fastapi.staticfiles import StaticFiles
+
+logger = logging.getLogger(__name__)
+
+# "cloudinary" (production) or "local" (offline dev / benchmarks)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+CLOUDINARY_FOLDER = "community_app_posts"
+LOCAL_MEDIA_DIR = os.getenv("LOCAL_MEDIA_DIR", "./media")
+LOCAL_MEDIA_BASE_URL = os.getenv("LOCAL_MEDIA_BASE_URL", "http://127.0.0.1:8000/media")
+
+# Objects are keyed by a hash of their bytes, so a key's content never changes.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Smaller renditions live next to the full image as <key>_<name>.webp
+VARIANT_NAMES = ("medium", "thumb")
+_CONTENT_ADDRESSED = re.compile(r"^(?P<base>.*/[0-9a-f]{64})\.webp$")
+
+# --- 1. BACKENDS ---
+# Both return {"url": ..., "public_id": ...}, same as the upload endpoint.
+class CloudinaryStorage:
+    def __init__(self):
+        # Imported and configured on first use, not when the router loads
+        import cloudinary
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+
+    def _url(self, public_id: str) -> str:
+        import cloudinary.utils
+        url, _ = cloudinary.utils.cloudinary_url(public_id, secure=True, format="webp")
+        return url
+
+    def _exists(self, url: str) -> bool:
+        # HEAD on the CDN delivery URL: no Admin API call, so no rate limit
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, method="HEAD"), timeout=5) as resp:
+                return resp.status == 200
+        except Exception:
+            return False
+
+    async def get(self, key: str):
+        public_id = f"{CLOUDINARY_FOLDER}/{key}"
+        url = self._url(public_id)
+        if await asyncio.to_thread(self._exists, url):
+            return {"url": url, "public_id": public_id}
+        return None
+
+    async def put(self, key: str, data: bytes):
+        import cloudinary.uploader
+        result = await asyncio.to_thread(
+            cloudinary.uploader.upload,
+            io.BytesIO(data),
+            folder=CLOUDINARY_FOLDER,
+            public_id=key,
+            overwrite=False
+        )
+        return {"url": result.get("secure_url"), "public_id": result.get("public_id")}
+
+class LocalStorage:
+    def __init__(self, directory: str = LOCAL_MEDIA_DIR, base_url: str = LOCAL_MEDIA_BASE_URL):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.webp")
+
+    def _result(self, key: str):
+        return {"url": f"{self.base_url}/{key}.webp", "public_id": key}
+
+    def _write(self, key: str, data: bytes):
+        # Write then rename, so readers never see a half-written file
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+
+    async def get(self, key: str):
+        if os.path.exists(self._path(key)):
+            return self._result(key)
+        return None
+
+    async def put(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, key, data)
+        return self._result(key)
+
+_storage = None
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        else:
+            _storage = CloudinaryStorage()
+        logger.info(f"Image storage backend: {STORAGE_BACKEND}")
+    return _storage
+
+def variant_key(key: str, name: str) -> str:
+    return key if name == "full" else f"{key}_{name}"
+
+def variant_urls(url):
+    # Derived from the URL alone, so no extra column or query is needed.
+    # Images uploaded before renditions existed only have "full".
+    if not url:
+        return {}
+    match = _CONTENT_ADDRESSED.match(url)
+    if match is None:
+        return {"full": url}
+    variants = {name: f"{match['base']}_{name}.webp" for name in VARIANT_NAMES}
+    variants["full"] = url
+    return variants
+
+async def store_renditions(key: str, renditions: dict):
+    # Full image goes last: if it exists, the smaller ones do too.
+    backend = get_storage()
+    for name, data in renditions.items():
+        if name != "full":
+            await backend.put(variant_key(key, name), data)
+    return await backend.put(key, renditions["full"])
+
+# --- 2. RETRY DEDUP ---
+# Raw upload hash -> stored result. The app re-sends the same photo when the
+# network flakes; this answers the retry without decoding or uploading again.
+RECENT_UPLOADS_MAX = 1024
+_recent_uploads = OrderedDict()
+
+def recent_upload(raw_digest: str):
+    result = _recent_uploads.get(raw_digest)
+    if result is not None:
+        _recent_uploads.move_to_end(raw_digest)
+    return result
+
+def remember_upload(raw_digest: str, result: dict):
+    _recent_uploads[raw_digest] = result
+    _recent_uploads.move_to_end(raw_digest)
+    while len(_recent_uploads) > RECENT_UPLOADS_MAX:
+        _recent_uploads.popitem(last=False)
+
+# --- 3. STATIC SERVING (local backend only) ---
+class ImmutableStaticFiles(StaticFiles):
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,55 @@
+# backend/tests/conftest.py
+#
+# Runs the real app from main.py (lifespan included) against a throwaway SQLite
+# database seeded by benchmarks/seed.py. The environment has to be set before
+# main is imported: database.py reads DATABASE_URL at import time.
+#
+#   cd backend
+#   python -m pytest -q
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_TMP = tempfile.mkdtemp(prefix="tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["MIGRATE_ON_STARTUP"] = "true"
+# Statements are only recorded when the watch is on; the budgets are checked by the fixture below
+if os.environ.get("QUERY_WATCH", "").lower() not in ("1", "true", "strict"):
+    os.environ["QUERY_WATCH"] = "1"
+
+from fastapi.testclient import TestClient
+
+SEED = {"users": 20, "posts": 200}
+
+@pytest.fixture(scope="session")
+def client():
+    from main import app
+    from database import engine
+    from benchmarks.seed import seed
+
+    with TestClient(app) as test_client:
+        test_client.portal.call(lambda: seed(engine, **SEED))
+        yield test_client
+
+@pytest.fixture(scope="session")
+def auth_headers():
+    from auth_utils import create_access_token
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'user1'})}"}
+
+@pytest.fixture
+def query_budget():
+    # with query_budget("GET /posts/"): client.get("/posts/")
+    # Fails the test when the block runs more statements than ROUTE_BUDGETS allows
+    # for that route (or than an explicit budget=).
+    import querywatch
+
+    def check(route: str, budget: int = None):
+        return querywatch.count_queries(budget=querywatch.ROUTE_BUDGETS[route] if budget is None else budget)
+    return check
@@ -0,0 +1,32 @@
+# backend/tests/test_etags.py
+#
+# A 304 is only right when everything in the payload is unchanged.
+
+from sqlalchemy import insert, update
+
+import models
+from database import AsyncSessionLocal
+
+def _award(user_id: int, post_id: int):
+    # What approving a task does to the resolver, without the task transition
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(models.PointsLedger).values(
+                user_id=user_id, post_id=post_id, delta=50, reason="test_award"
+            ))
+            await db.execute(update(models.User).where(models.User.id == user_id).values(points=models.User.points + 50))
+            await db.commit()
+    return run
+
+def test_comment_thread_etag_follows_author_points(client):
+    post_id = next(post["id"] for post in client.get("/posts/").json() if post["comment_count"])
+    first = client.get("/comments/", params={"post_id": post_id})
+    etag = first.headers["ETag"]
+    assert client.get("/comments/", params={"post_id": post_id}, headers={"If-None-Match": etag}).status_code == 304
+
+    commenter = first.json()[0]
+    client.portal.call(_award(commenter["author_id"], post_id))
+
+    fresh = client.get("/comments/", params={"post_id": post_id}, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()[0]["author"]["points"] == commenter["author"]["points"] + 50
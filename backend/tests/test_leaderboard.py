@@ -0,0 +1,62 @@
+# backend/tests/test_leaderboard.py
+#
+# The in-memory ranking must not lose awards made while a reload's query is
+# in flight: the reload swaps in a snapshot that may predate them.
+
+import asyncio
+
+import pytest
+
+import leaderboard
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+class _SlowSession:
+    # Stands in for AsyncSession: returns a fixed snapshot after yielding to the loop
+    def __init__(self, rows, during=None):
+        self.rows, self.during = rows, during
+
+    async def execute(self, statement):
+        await asyncio.sleep(0)
+        if self.during:
+            self.during()
+        return _Result(self.rows)
+
+@pytest.fixture
+def ranking(monkeypatch):
+    monkeypatch.setattr(leaderboard, "_keys", [])
+    monkeypatch.setattr(leaderboard, "_users", {})
+    monkeypatch.setattr(leaderboard, "_loaded_at", None)
+    monkeypatch.setattr(leaderboard, "LEADERBOARD_REFRESH_SECONDS", 0)
+    return leaderboard
+
+def test_award_during_reload_survives(ranking):
+    snapshot = [(1, "alice", 10), (2, "bob", 20)]
+    asyncio.run(ranking.ensure_loaded(_SlowSession(snapshot)))
+    assert [entry["username"] for entry in ranking.top(2)] == ["bob", "alice"]
+
+    # alice gets 50 points after the reload's query read her old total
+    award = lambda: ranking.set_points(1, "alice", 60)
+    asyncio.run(ranking.ensure_loaded(_SlowSession(snapshot, during=award)))
+
+    assert ranking.top(2) == [
+        {"rank": 1, "username": "alice", "points": 60},
+        {"rank": 2, "username": "bob", "points": 20},
+    ]
+    assert ranking._pending is None
+
+def test_sign_up_during_first_load_survives(ranking):
+    sign_up = lambda: ranking.set_points(3, "carol", 0)
+    asyncio.run(ranking.ensure_loaded(_SlowSession([(1, "alice", 10)], during=sign_up)))
+    assert ranking.around(3, 1)["rank"] == 2
+
+def test_set_points_keeps_order(ranking):
+    asyncio.run(ranking.ensure_loaded(_SlowSession([(1, "alice", 10), (2, "bob", 20), (3, "carol", 20)])))
+    ranking.set_points(2, "bob", 5)
+    assert ranking._keys == sorted(ranking._keys)
+    assert [(entry["username"], entry["rank"]) for entry in ranking.top(3)] == [("carol", 1), ("alice", 2), ("bob", 3)]
@@ -0,0 +1,47 @@
+# backend/tests/test_query_budgets.py
+#
+# Statement budgets for the hot read routes (ROUTE_BUDGETS in querywatch.py).
+# A route that grows an N+1 fails here with the listing of what it ran.
+
+import pytest
+
+import querywatch
+from benchmarks.seed import CITIES
+
+LAT, LON = CITIES[0]
+
+HOT_ROUTES = [
+    ("GET /posts/", "/posts/", {"limit": 20}),
+    ("GET /posts/nearby", "/posts/nearby", {"lat": LAT, "lon": LON, "radius_m": 3000, "limit": 20}),
+    ("GET /posts/in-bbox", "/posts/in-bbox", {"bbox": f"{LON - 0.1},{LAT - 0.1},{LON + 0.1},{LAT + 0.1}"}),
+    ("GET /posts/search", "/posts/search", {"q": "pothole", "limit": 20}),
+    ("GET /posts/clusters", "/posts/clusters", {"bbox": f"{LON - 0.5},{LAT - 0.5},{LON + 0.5},{LAT + 0.5}", "zoom": 12}),
+    ("GET /posts/{post_id}", "/posts/1", {}),
+    ("GET /comments/", "/comments/", {"post_id": 1}),
+]
+
+@pytest.mark.parametrize("signed_in", [False, True], ids=["anonymous", "signed-in"])
+@pytest.mark.parametrize("route,path,params", HOT_ROUTES, ids=[route for route, _, _ in HOT_ROUTES])
+def test_hot_route_within_budget(client, auth_headers, query_budget, route, path, params, signed_in):
+    with query_budget(route):
+        response = client.get(path, params=params, headers=auth_headers if signed_in else {})
+    assert response.status_code == 200, response.text
+
+def test_feed_next_page_within_budget(client, auth_headers, query_budget):
+    first = client.get("/posts/", params={"limit": 20}, headers=auth_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    with query_budget("GET /posts/"):
+        response = client.get("/posts/", params={"limit": 20, "cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 200
+    assert {post["id"] for post in response.json()}.isdisjoint(post["id"] for post in first.json())
+
+def test_unchanged_feed_is_one_lookup(client, query_budget):
+    etag = client.get("/posts/", params={"limit": 20}).headers["ETag"]
+    with query_budget("GET /posts/", budget=1):
+        response = client.get("/posts/", params={"limit": 20}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_over_budget_fails(client, query_budget):
+    with pytest.raises(querywatch.QueryBudgetExceeded, match="budget 1"):
+        with query_budget("GET /posts/", budget=1):
+            client.get("/posts/", params={"limit": 20})
@@ -0,0 +1,32 @@
+# backend/tests/test_startup.py
+#
+# Cold-start budget from benchmarks/startup.py: fresh interpreters import main
+# and run its lifespan against a migrated throwaway database.
+
+import statistics
+
+import pytest
+
+from benchmarks import startup
+
+RUNS = 3
+
+@pytest.fixture(scope="module")
+def cold_starts():
+    env = startup.prepare_env()
+    # Production workers don't run with the query watch the test suite turns on
+    env.pop("QUERY_WATCH", None)
+    startup.measure(env)  # Writes the bytecode caches, like the first boot after a deploy
+    return [startup.measure(env) for _ in range(RUNS)]
+
+def test_import_within_budget(cold_starts):
+    import_ms = statistics.median(run["import_ms"] for run in cold_starts)
+    assert import_ms <= startup.IMPORT_BUDGET_MS, f"import main took {import_ms:.0f} ms"
+
+def test_startup_within_budget(cold_starts):
+    startup_ms = statistics.median(run["startup_ms"] for run in cold_starts)
+    assert startup_ms <= startup.STARTUP_BUDGET_MS, f"startup took {startup_ms:.0f} ms"
+
+def test_heavy_modules_load_lazily(cold_starts):
+    loaded = sorted({module for run in cold_starts for module in run["loaded"]})
+    assert not loaded, f"{', '.join(loaded)} imported at startup; import them where they are used"
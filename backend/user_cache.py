@@ -0,0 +1,57 @@
+# backend/user_cache.py
+
+import os
+import time
+from collections import OrderedDict
+
+# Token -> user snapshot, so get_current_user doesn't hit the DB on every request.
+# Snapshots are plain schemas.User objects (detached from any session).
+# Entries die at the token's own expiry or after the TTL, whichever comes first;
+# the TTL bounds how stale a snapshot can get on workers that never saw the write.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+_entries = OrderedDict()      # token -> (expires_at, user)
+_tokens_by_user = {}          # user id -> set of tokens
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def _forget(token):
+    entry = _entries.pop(token, None)
+    if entry is not None:
+        tokens = _tokens_by_user.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del _tokens_by_user[entry[1].id]
+
+def get(token: str):
+    entry = _entries.get(token)
+    if entry is None or entry[0] <= time.time():
+        if entry is not None:
+            _forget(token)
+        _stats["misses"] += 1
+        return None
+    _entries.move_to_end(token)
+    _stats["hits"] += 1
+    return entry[1]
+
+def put(token: str, user, token_expires_at=None):
+    expires_at = time.time() + USER_CACHE_TTL_SECONDS
+    if token_expires_at is not None:
+        expires_at = min(expires_at, token_expires_at)
+    _forget(token)
+    _entries[token] = (expires_at, user)
+    _tokens_by_user.setdefault(user.id, set()).add(token)
+    while len(_entries) > USER_CACHE_MAX_ENTRIES:
+        _forget(next(iter(_entries)))
+
+def invalidate_user(user_id):
+    # Call after anything that changes a user's row (points, profile, ...)
+    tokens = _tokens_by_user.pop(user_id, None)
+    if tokens:
+        _stats["invalidations"] += 1
+        for token in tokens:
+            _entries.pop(token, None)
+
+def stats() -> dict:
+    return {**_stats, "size": len(_entries)}
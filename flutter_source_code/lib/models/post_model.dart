@@ -45,11 +45,22 @@ class Comment {
   }
 }
 
+// One page of a comment thread, newest first.
+// nextCursor is null on the last page.
+class CommentPage {
+  final List<Comment> comments;
+  final String? nextCursor;
+  final int? totalCount;
+
+  CommentPage({required this.comments, this.nextCursor, this.totalCount});
+}
+
 // ------------------ POST MODEL ------------------
 
 class Post {
   final int id;
   final String imageUrl;
+  final String previewUrl; // Medium rendition, for feed cards
   final String? caption;
   final double latitude;
   final double longitude;
@@ -59,12 +70,15 @@ class Post {
   final UserPublic? resolvedBy;
   final DateTime createdAt;
 
-  // Comment list
+  // Comment list (the feed only sends the latest few)
   final List<Comment> comments;
+  final int commentCount;
+  final int likeCount;
 
   Post({
     required this.id,
     required this.imageUrl,
+    required this.previewUrl,
     this.caption,
     required this.latitude,
     required this.longitude,
@@ -74,12 +88,20 @@ class Post {
     this.resolvedBy,
     required this.createdAt,
     required this.comments,
+    this.commentCount = 0,
+    this.likeCount = 0,
   });
 
   factory Post.fromJson(Map<String, dynamic> json) {
+    final comments = (json['comments'] as List?)
+        ?.map((x) => Comment.fromJson(x))
+        .toList() ??
+        <Comment>[];
+
     return Post(
       id: json['id'],
       imageUrl: json['image_url'] ?? '',
+      previewUrl: json['image_variants']?['medium'] ?? json['image_url'] ?? '',
       caption: json['caption'],
       latitude: json['latitude']?.toDouble() ?? 0.0,
       longitude: json['longitude']?.toDouble() ?? 0.0,
@@ -95,11 +117,9 @@ class Post {
           ? DateTime.parse(json['created_at'])
           : DateTime.now(),
 
-      // map list of comments
-      comments: (json['comments'] as List?)
-          ?.map((x) => Comment.fromJson(x))
-          .toList() ??
-          [],
+      comments: comments,
+      commentCount: json['comment_count'] ?? comments.length,
+      likeCount: json['like_count'] ?? (json['likes'] as List?)?.length ?? 0,
     );
   }
 }
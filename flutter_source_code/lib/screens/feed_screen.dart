@@ -104,7 +104,7 @@ class _FeedScreenState extends State<FeedScreen> {
               child: Hero(
                 tag: "post_img_${post.id}",
                 child: Image.network(
-                  post.imageUrl,
+                  post.previewUrl,
                   height: 200,
                   width: double.infinity,
                   fit: BoxFit.cover,
@@ -134,7 +134,7 @@ class _FeedScreenState extends State<FeedScreen> {
                       const SizedBox(width: 8),
                       const Icon(Icons.comment_outlined, size: 18, color: Colors.grey),
                       const SizedBox(width: 4),
-                      Text("${post.comments.length}", style: const TextStyle(color: Colors.grey)),
+                      Text("${post.commentCount}", style: const TextStyle(color: Colors.grey)),
                     ],
                   ),
 
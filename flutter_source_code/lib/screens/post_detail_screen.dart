@@ -15,13 +15,46 @@ class PostDetailScreen extends StatefulWidget {
 class _PostDetailScreenState extends State<PostDetailScreen> {
   final FeedService _feedService = FeedService();
   final TextEditingController _commentController = TextEditingController();
-  late List<Comment> _comments; // Local state to update UI instantly
+  late List<Comment> _comments;
   bool _isPosting = false;
 
+  // Feed and profile cards carry at most a few comments, so the thread is
+  // loaded here and paged with the X-Next-Cursor the API returns
+  String? _nextCursor;
+  bool _isLoadingComments = false;
+  bool _threadLoaded = false;
+  String? _commentsError;
+
   @override
   void initState() {
     super.initState();
-    _comments = widget.post.comments; // Initialize with data passed from Feed
+    _comments = widget.post.comments; // Preview from the card until the thread arrives
+    _loadComments();
+  }
+
+  Future<void> _loadComments({bool older = false}) async {
+    if (_isLoadingComments) return;
+    setState(() {
+      _isLoadingComments = true;
+      _commentsError = null;
+    });
+    try {
+      final page = await _feedService.getComments(
+        widget.post.id,
+        cursor: older ? _nextCursor : null,
+      );
+      if (!mounted) return;
+      setState(() {
+        _comments = older ? [..._comments, ...page.comments] : page.comments;
+        _nextCursor = page.nextCursor;
+        _threadLoaded = true;
+      });
+    } catch (e) {
+      if (!mounted) return;
+      setState(() => _commentsError = e.toString());
+    } finally {
+      if (mounted) setState(() => _isLoadingComments = false);
+    }
   }
 
   Future<void> _submitComment() async {
@@ -32,16 +65,11 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
       // 1. Send to Backend
       await _feedService.postComment(widget.post.id, _commentController.text.trim());
 
-      // 2. Optimistic Update (or re-fetch). For MVP, we'll re-fetch just to be safe,
-      // or you can manually append if you trust the API success.
-      // Ideally, the API should return the new Comment object.
-      // Since our API returns the Comment object, let's just append it if we parse it.
-      // For now, let's just show success and clear. To see it, user can refresh.
-      // BETTER UX: Manually add a "fake" comment or fetch fresh data.
-      // Let's just clear for now.
-
+      // 2. Reload the newest page so the new comment shows up
       _commentController.clear();
-      ScaffoldMessenger.of(context).showSnackBar(const SnackBar(content: Text("Comment Posted! Refresh to see.")));
+      await _loadComments();
+      if (!mounted) return;
+      ScaffoldMessenger.of(context).showSnackBar(const SnackBar(content: Text("Comment Posted!")));
 
     } catch (e) {
       ScaffoldMessenger.of(context).showSnackBar(SnackBar(content: Text(e.toString())));
@@ -90,7 +118,12 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
                 const SizedBox(height: 10),
 
                 // --- COMMENTS LIST ---
-                if (_comments.isEmpty)
+                if (_comments.isEmpty && !_threadLoaded && _commentsError == null)
+                  const Padding(
+                    padding: EdgeInsets.all(20.0),
+                    child: Center(child: CircularProgressIndicator()),
+                  )
+                else if (_comments.isEmpty && _threadLoaded)
                   const Padding(
                     padding: EdgeInsets.all(20.0),
                     child: Center(child: Text("No comments yet. Be the first!")),
@@ -109,6 +142,25 @@ class _PostDetailScreenState extends State<PostDetailScreen> {
                       style: const TextStyle(color: Colors.grey, fontSize: 10),
                     ),
                   )),
+
+                // --- PAGING / ERRORS ---
+                if (_commentsError != null)
+                  TextButton(
+                    onPressed: () => _loadComments(older: _threadLoaded),
+                    child: const Text("Couldn't load comments. Tap to retry."),
+                  )
+                else if (_nextCursor != null)
+                  Center(
+                    child: _isLoadingComments
+                        ? const Padding(
+                            padding: EdgeInsets.all(8.0),
+                            child: CircularProgressIndicator(strokeWidth: 2),
+                          )
+                        : TextButton(
+                            onPressed: () => _loadComments(older: true),
+                            child: const Text("Load older comments"),
+                          ),
+                  ),
               ],
             ),
           ),
@@ -25,11 +25,12 @@ class FeedService {
   }
 
   // --- 1. GET FEED ---
-  Future<List<Post>> getFeed({int skip = 0, int limit = 10}) async {
+  // Pass the X-Next-Cursor header of the previous page as cursor for the next one.
+  Future<List<Post>> getFeed({String? cursor, int limit = 10}) async {
     try {
       final response = await _dio.get(
         '/posts/',
-        queryParameters: {'skip': skip, 'limit': limit},
+        queryParameters: {'limit': limit, if (cursor != null) 'cursor': cursor},
       );
 
       if (response.statusCode == 200) {
@@ -122,7 +123,31 @@ class FeedService {
     }
   }
 
-  // --- 6. ADD COMMENT ---
+  // --- 6. GET COMMENTS ---
+  // Newest first. Pass the previous page's nextCursor to get older ones.
+  Future<CommentPage> getComments(int postId, {String? cursor, int limit = 20}) async {
+    try {
+      final response = await _dio.get(
+        '/comments/',
+        queryParameters: {
+          'post_id': postId,
+          'limit': limit,
+          if (cursor != null) 'cursor': cursor,
+        },
+      );
+      final total = response.headers.value('x-total-count');
+      return CommentPage(
+        comments: (response.data as List).map((x) => Comment.fromJson(x)).toList(),
+        nextCursor: response.headers.value('x-next-cursor'),
+        totalCount: total != null ? int.tryParse(total) : null,
+      );
+    } catch (e) {
+      print("Comments error: $e");
+      throw "Failed to load comments";
+    }
+  }
+
+  // --- 7. ADD COMMENT ---
   Future<bool> postComment(int postId, String content) async {
     try {
       final response = await _dio.post(